@@ -3,6 +3,7 @@ import time
 import signal
 import smtplib
 import subprocess
+import shutil
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timezone, timedelta
@@ -18,7 +19,7 @@ import platform
 from contextlib import contextmanager
 from dotenv import load_dotenv
 from gmailextract import main as gmail_main, CUTOFF_DATE
-from verify_state import verify_state
+from verify_state import verify_state, count_ids_in_collection
 from sync_mongodb import sync_mongodb
 from mongo_loader import MongoDBLoader
 
@@ -126,16 +127,12 @@ class BackgroundProcessor:
             # Backup filtered emails
             if os.path.exists('filtered_emails.json'):
                 backup_path = self.backup_dir / f"filtered_emails_{timestamp}.json"
-                with open('filtered_emails.json', 'r') as source:
-                    with open(backup_path, 'w') as target:
-                        json.dump(json.load(source), target, indent=4)
+                shutil.copyfile('filtered_emails.json', backup_path)
                         
             # Backup checkpoint
             if os.path.exists(self.checkpoint_path):
                 backup_path = self.backup_dir / f"checkpoint_{timestamp}.json"
-                with open(self.checkpoint_path, 'r') as source:
-                    with open(backup_path, 'w') as target:
-                        json.dump(json.load(source), target, indent=4)
+                shutil.copyfile(self.checkpoint_path, backup_path)
                         
             self.state.last_backup_time = current_time.isoformat()
             logger.info(f"Backup created at {timestamp}")
@@ -185,8 +182,10 @@ class BackgroundProcessor:
                         gmail_thread.start()
                         
                         while self.running and gmail_thread.is_alive():
-                            # Get counts from both MongoDB and JSON
-                            current_mongo_count = mongo_loader.collection.count_documents({})
+                            # Get counts from both MongoDB and JSON. The poll runs
+                            # every couple of seconds, so read the collection's
+                            # metadata count instead of counting documents
+                            current_mongo_count = mongo_loader.collection.estimated_document_count()
 
                             try:
                                 with open('filtered_emails.json', 'r') as f:
@@ -220,8 +219,10 @@ class BackgroundProcessor:
                                     self.send_progress_notification()
                                     last_notification_time = current_time
                                     
-                            # Update latest email date
+                            # Update latest email date; only parsedDate is
+                            # fetched, not the whole email body
                             latest = mongo_loader.collection.find_one(
+                                {}, {"parsedDate": 1, "_id": 0},
                                 sort=[("parsedDate", -1)]
                             )
                             if latest and latest.get("parsedDate"):
@@ -335,7 +336,8 @@ class BackgroundProcessor:
                 return False
                 
             try:
-                mongo_loader.initialize_database()
+                # Indexes are set up once at startup; verification only reads
+                mongo_loader.use_collection()
                 stats = mongo_loader.get_collection_stats()
                 
                 if not stats:
@@ -355,11 +357,14 @@ class BackgroundProcessor:
                         logger.error(f"Document count mismatch: JSON={json_count}, MongoDB={mongo_count}")
                         return False
                         
-                    # Compare IDs
-                    json_ids = set(email['id'] for email in json_data)
-                    mongo_ids = set(str(doc['id']) for doc in mongo_loader.collection.find({}, {'id': 1}))
+                    # Compare IDs. The counts match and MongoDB ids are unique,
+                    # so the sets are equal exactly when every stored document
+                    # has one of the JSON ids; checked with indexed $in counts
+                    # rather than pulling every MongoDB id
+                    json_ids = list(set(email['id'] for email in json_data))
+                    shared_count = count_ids_in_collection(mongo_loader.collection, json_ids)
                     
-                    if json_ids != mongo_ids:
+                    if shared_count != mongo_count:
                         logger.error("ID sets don't match between JSON and MongoDB")
                         return False
                         
@@ -439,7 +444,7 @@ class BackgroundProcessor:
             # Get current MongoDB count
             mongo_loader = MongoDBLoader()
             if mongo_loader.connect():
-                current_count = mongo_loader.collection.count_documents({})
+                current_count = mongo_loader.use_collection().estimated_document_count()
                 mongo_loader.close()
             else:
                 current_count = self._last_known_count
@@ -1,29 +1,33 @@
 import os.path
 import base64
+import binascii
 import quopri
 import json
 import pickle
+import orjson
 import logging
 import re
 import html
 import time
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parseaddr, parsedate_to_datetime
 from datetime import datetime, timezone, timedelta
-from ratelimit import limits, sleep_and_retry
-from ratelimit import RateLimitException
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 from mongo_loader import MongoDBLoader
 from incremental_email_handler import IncrementalEmailHandler
 from typing import Dict
 
 
-# Setup logging configuration with DEBUG level
+# Setup logging configuration; per-message debug output is opt-in
 logging.basicConfig(
-    level=logging.DEBUG,  # Changed from INFO to DEBUG
+    level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler('gmail_filter.log'),
@@ -38,8 +42,8 @@ SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 # Load the FILTER_SENDERS from the JSON file
 def load_filter_senders(filename="filter_senders.json"):
     try:
-        with open(filename, "r") as f:
-            senders = json.load(f)
+        with open(filename, "rb") as f:
+            senders = orjson.loads(f.read())
             if not isinstance(senders, list):
                 raise ValueError("Expected a list of email addresses")
             return senders
@@ -51,14 +55,146 @@ def load_filter_senders(filename="filter_senders.json"):
         logger.error(f"Unexpected error loading filter senders: {e}")
     return []
 
+def split_filter_senders(senders):
+    """
+    Split filter entries into exact addresses and domain suffixes.
+
+    Entries with a local part ("news@example.com") must match the sender's
+    address exactly; bare domains ("example.com" or "@example.com") match any
+    address at that domain or its subdomains. Matching is case-insensitive.
+
+    Returns:
+        Tuple of (frozenset of lowercase addresses, tuple of lowercase suffixes)
+    """
+    addresses = set()
+    suffixes = []
+    for entry in senders:
+        entry = entry.strip().lower()
+        if not entry:
+            continue
+        if '@' in entry.lstrip('@'):
+            addresses.add(entry)
+        else:
+            domain = entry.lstrip('@')
+            suffixes.extend(('@' + domain, '.' + domain))
+    return frozenset(addresses), tuple(suffixes)
+
+def sender_address(sender):
+    """Return the lowercase address from a From header."""
+    # Fast path for the usual 'Name <address>' form; parseaddr handles the rest
+    if sender.endswith('>'):
+        start = sender.rfind('<')
+        if start != -1:
+            address = sender[start + 1:-1].strip()
+            if address and not any(c in address for c in ' <>,"'):
+                return address.lower()
+    return parseaddr(sender)[1].lower()
+
+def build_sender_matcher(senders):
+    """
+    Build the From header check for a fixed list of filter senders.
+
+    The list never changes after startup, so the returned function only does
+    the lookups it needs: a set membership test for exact addresses, one
+    str.endswith call for domain entries, or both.
+
+    Args:
+        senders: Filter entries as returned by load_filter_senders
+
+    Returns:
+        Function taking a From header (or None) and returning whether it matches
+    """
+    addresses, suffixes = split_filter_senders(senders)
+    if addresses and suffixes:
+        def matches(address):
+            return address in addresses or address.endswith(suffixes)
+    elif suffixes:
+        def matches(address):
+            return address.endswith(suffixes)
+    elif addresses:
+        matches = addresses.__contains__
+    else:
+        return lambda sender: False
+
+    def is_filtered_sender(sender):
+        return bool(sender) and matches(sender_address(sender))
+    return is_filtered_sender
+
+def build_sender_query(senders):
+    """
+    Build a Gmail search clause matching any of the filter senders.
+
+    Gmail treats a bare domain in from: as matching its addresses, so the
+    clause mirrors split_filter_senders. is_filtered_sender still checks each
+    message, as Gmail's matching is looser than ours.
+
+    Returns:
+        str: e.g. '{from:news@example.com from:example.org}', or '' if there
+        are no senders
+    """
+    entries = sorted({entry.strip().lower().lstrip('@') for entry in senders} - {''})
+    if not entries:
+        return ''
+    return '{' + ' '.join(f'from:{entry}' for entry in entries) + '}'
+
 # Initialize FILTER_SENDERS
 FILTER_SENDERS = load_filter_senders()
+is_filtered_sender = build_sender_matcher(FILTER_SENDERS)
+SENDER_QUERY = build_sender_query(FILTER_SENDERS)
 
-# Rate limiting constants
-CALLS_PER_SECOND = 30 # Increased rate limit
+# Rate limiting constants (Gmail allows 250 quota units per user per second)
+QUOTA_UNITS_PER_SECOND = 250
+LIST_QUOTA_COST = 5  # messages.list
+GET_QUOTA_COST = 5  # messages.get
 CUTOFF_DATE = datetime(2024, 11, 14, tzinfo=timezone.utc)
-PAGE_SIZE = 70  # Larger batch size
-BATCH_DELAY = 1  # Delay between batches in seconds
+PAGE_SIZE = 500  # messages.list maximum; bodies are still fetched BATCH_SIZE at a time
+BATCH_SIZE = 50  # Messages fetched per batch HTTP request (Gmail allows up to 100)
+MONGO_BULK_SIZE = 100  # Documents per MongoDB insert_many call
+# Threads parsing a fetched batch; lexbor releases the GIL while parsing HTML
+PARSE_WORKERS = min(8, os.cpu_count() or 1)
+# Partial response: only the fields read_headers and parse_message use, which
+# leaves out attachment metadata, part headers, sizes and history ids
+FULL_MESSAGE_FIELDS = (
+    'id,threadId,labelIds,snippet,internalDate,'
+    'payload(headers,mimeType,body/data,'
+    'parts(mimeType,body/data,parts(mimeType,body/data,parts)))'
+)
+
+# Entities that make up almost all of those seen in newsletters; anything else
+# is resolved by html.unescape. _ENTITY_RE mirrors the pattern html uses itself.
+_FAST_ENTITIES = {
+    '&amp;': '&',
+    '&lt;': '<',
+    '&gt;': '>',
+    '&quot;': '"',
+    '&#39;': "'",
+    '&nbsp;': '\xa0'
+}
+_ENTITY_RE = re.compile(r'&(#[0-9]+;?|#[xX][0-9a-fA-F]+;?|[^\t\n\f <&#;]{1,32};?)')
+
+# Patterns used on every message, compiled once
+_URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+_TRAIL_PUNCT_RE = re.compile(r'[.,;!?)]+$')
+_URL_ARTIFACT_RE = re.compile(r'http\S*|\[link\]|\[/link\]|\(link\)|\(/link\)')
+_PAD_DAY_RE = re.compile(r'(\w{3}), (\d)\b')
+_TZ_RE = re.compile(r'([+-])(\d{2})(\d{2})')
+# Translation table mapping the URL-safe alphabet onto the standard one, and
+# the bytes outside both alphabets (whitespace, stray padding, ...) to delete
+_B64_URLSAFE_TABLE = bytes.maketrans(b'-_', b'+/')
+_B64_DELETE = bytes(
+    b for b in range(256)
+    if b not in b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/-_'
+)
+
+def _replace_entity(match):
+    entity = match.group(0)
+    return _FAST_ENTITIES.get(entity) or html.unescape(entity)
+
+def unescape_entities(text):
+    """Decode HTML entities, using a lookup table for the common ones."""
+    if '&' not in text:
+        return text
+    return _ENTITY_RE.sub(_replace_entity, text)
 
 class EmailCleaner:
     """A class to handle email content cleaning and structuring."""
@@ -69,35 +205,55 @@ class EmailCleaner:
         if not text:
             return ""
         
-        # Extract URLs before cleaning
-        urls = EmailCleaner.extract_urls(text)
-        
         # Remove URLs from text
-        for url in urls:
-            text = text.replace(url, '')
-            
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
+        _, text = EmailCleaner._strip_urls(text)
+        return EmailCleaner._normalize_text(text)
+
+    @staticmethod
+    def _strip_urls(text):
+        """
+        Remove URLs from text in a single pass.
+
+        Returns:
+            Tuple of (URLs with trailing punctuation removed, text without the URLs)
+        """
+        urls = []
+        pieces = []
+        last_end = 0
+        for match in _URL_RE.finditer(text):
+            url = match.group(0)
+            cleaned_url = _TRAIL_PUNCT_RE.sub('', url)
+            urls.append(cleaned_url)
+            # Trailing punctuation belongs to the surrounding sentence, so keep it
+            pieces.append(text[last_end:match.start()])
+            pieces.append(url[len(cleaned_url):])
+            last_end = match.end()
+        if not urls:
+            return urls, text
+        pieces.append(text[last_end:])
+        return urls, ''.join(pieces)
+
+    @staticmethod
+    def _normalize_text(text):
+        """Decode entities, drop invisible characters and URL artifacts, and collapse whitespace."""
         # Decode HTML entities
-        text = html.unescape(text)
+        text = unescape_entities(text)
         
         # Remove special characters and normalize
         text = text.replace('\u200c', '').replace('\ufeff', '')
         
         # Remove any remaining URL artifacts
-        text = re.sub(r'http\S*|\[link\]|\[/link\]|\(link\)|\(/link\)', '', text)
-        text = re.sub(r'\s+', ' ', text)  # Clean up spaces again
+        text = _URL_ARTIFACT_RE.sub('', text)
         
-        return text.strip()
+        # Remove excessive whitespace
+        return ' '.join(text.split())
 
     @staticmethod
     def extract_urls(text):
         """Extract URLs from text content."""
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        urls = re.findall(url_pattern, text)
+        urls = _URL_RE.findall(text)
         # Remove trailing punctuation from URLs
-        cleaned_urls = [re.sub(r'[.,;!?)]+$', '', url) for url in urls]
+        cleaned_urls = [_TRAIL_PUNCT_RE.sub('', url) for url in urls]
         return cleaned_urls
 
     @staticmethod
@@ -110,10 +266,9 @@ class EmailCleaner:
                 "length": 0
             }
 
-        # Extract URLs first
-        urls = EmailCleaner.extract_urls(raw_body)
-        # Then clean text (which will remove URLs)
-        cleaned_text = EmailCleaner.clean_text(raw_body)
+        # Collect URLs and remove them from the text in the same pass
+        urls, text = EmailCleaner._strip_urls(raw_body)
+        cleaned_text = EmailCleaner._normalize_text(text)
         
         return {
             "clean_text": cleaned_text,
@@ -122,12 +277,36 @@ class EmailCleaner:
         }
 
 class GmailRateLimiter:
-    """Handles rate limiting for Gmail API requests."""
+    """Handles rate limiting for Gmail API requests.
+
+    A token bucket sized to Gmail's per-user quota paces requests; HTTP 429/503
+    responses from the API are retried with exponential backoff.
+    """
     
-    def __init__(self, service):
+    RETRYABLE_STATUSES = (429, 503)
+
+    def __init__(self, service, units_per_second: float = QUOTA_UNITS_PER_SECOND):
         self.service = service
         self.backoff_time = 1  # Initial backoff time in seconds
         self.max_retries = 5
+        self.units_per_second = units_per_second
+        self._tokens = float(units_per_second)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float) -> None:
+        """Block until `cost` quota units are available, then consume them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.units_per_second,
+                self._tokens + (now - self._last_refill) * self.units_per_second
+            )
+            self._last_refill = now
+            self._tokens -= cost
+            deficit = -self._tokens
+        if deficit > 0:
+            time.sleep(deficit / self.units_per_second)
         
     def execute_with_backoff(self, func):
         """Execute a function with exponential backoff on rate limit errors."""
@@ -135,9 +314,12 @@ class GmailRateLimiter:
         while retries < self.max_retries:
             try:
                 return func()
-            except RateLimitException:
+            except HttpError as e:
+                if e.resp.status not in self.RETRYABLE_STATUSES:
+                    logger.error(f"API error: {e}")
+                    raise
                 wait_time = self.backoff_time * (2 ** retries)
-                logger.warning(f"Rate limit hit, waiting {wait_time} seconds...")
+                logger.warning(f"Rate limit hit (HTTP {e.resp.status}), waiting {wait_time} seconds...")
                 time.sleep(wait_time)
                 retries += 1
             except Exception as e:
@@ -147,9 +329,8 @@ class GmailRateLimiter:
         
     def list_messages(self, query, page_token=None):
         """Rate-limited message listing with backoff."""
-        @sleep_and_retry
-        @limits(calls=CALLS_PER_SECOND, period=1)
         def _list():
+            self.acquire(LIST_QUOTA_COST)
             return self.service.users().messages().list(
                 userId='me',
                 q=query,
@@ -159,20 +340,80 @@ class GmailRateLimiter:
             
         return self.execute_with_backoff(_list)
             
-    @sleep_and_retry
-    @limits(calls=CALLS_PER_SECOND, period=1)
+    def _get_request(self, msg_id):
+        """Build a messages.get request for the fields in FULL_MESSAGE_FIELDS."""
+        return self.service.users().messages().get(
+            userId='me',
+            id=msg_id,
+            format='full',
+            fields=FULL_MESSAGE_FIELDS
+        )
+
     def get_message(self, msg_id):
-        """Rate-limited message fetching."""
+        """Rate-limited message fetching with backoff."""
+        def _get():
+            self.acquire(GET_QUOTA_COST)
+            return self._get_request(msg_id).execute()
+
         try:
-            return self.service.users().messages().get(
-                userId='me',
-                id=msg_id,
-                format='full'
-            ).execute()
+            return self.execute_with_backoff(_get)
         except Exception as e:
             logger.error(f"Error getting message {msg_id}: {e}")
             raise
 
+    def get_messages(self, msg_ids):
+        """
+        Fetch several messages with a single batch HTTP request.
+
+        Args:
+            msg_ids: Message ids to fetch (at most 100 per Gmail batch)
+
+        Returns:
+            Dict mapping message id to message resource. Messages rejected with a
+            retryable status are refetched individually; other failures are logged
+            and left out.
+        """
+        messages = {}
+        retry_ids = []
+
+        def _on_message(request_id, response, exception):
+            if exception is None:
+                messages[request_id] = response
+            elif isinstance(exception, HttpError) and exception.resp.status in self.RETRYABLE_STATUSES:
+                retry_ids.append(request_id)
+            else:
+                logger.error(f"Error getting message {request_id}: {exception}")
+
+        def _batch():
+            self.acquire(GET_QUOTA_COST * len(msg_ids))
+            batch = self.service.new_batch_http_request(callback=_on_message)
+            for msg_id in msg_ids:
+                batch.add(self._get_request(msg_id), request_id=msg_id)
+            batch.execute()
+
+        self.execute_with_backoff(_batch)
+
+        for msg_id in retry_ids:
+            try:
+                messages[msg_id] = self.get_message(msg_id)
+            except Exception:
+                continue  # Already logged by get_message
+        return messages
+
+@lru_cache(maxsize=16)
+def _parse_iso(date_str: str) -> datetime:
+    """Parse a stored ISO 8601 timestamp, accepting a trailing 'Z'. Cached for repeated lookups."""
+    return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+
+def save_processing_logs(logs, filename='gmail_processing_logs.json'):
+    """Write the processing logs, using orjson unless a value needs the json fallback."""
+    try:
+        data = orjson.dumps(logs, option=orjson.OPT_INDENT_2)
+    except TypeError:
+        data = json.dumps(logs, indent=4, ensure_ascii=False, default=str).encode('utf-8')
+    with open(filename, 'wb') as logfile:
+        logfile.write(data)
+
 def construct_date_query(cutoff_date: datetime, date_range: Dict) -> str:
     """
     Construct Gmail query based on date ranges. If wanting to update, move the cutoff date to the current date, or past cutoff date+1.
@@ -184,18 +425,20 @@ def construct_date_query(cutoff_date: datetime, date_range: Dict) -> str:
     Returns:
         str: Gmail query string for date filtering
     """
-    base_query = 'category:primary OR category:updates'
+    # Only list messages from filter senders, so non-matching messages are
+    # never fetched
+    base_query = f'(category:primary OR category:updates) {SENDER_QUERY}'.rstrip()
     current_time = datetime.now(timezone.utc)
-    logger.debug(f"Current UTC time: {current_time}")
-    logger.debug(f"Cutoff date: {cutoff_date}")
+    logger.debug("Current UTC time: %s", current_time)
+    logger.debug("Cutoff date: %s", cutoff_date)
     
     # Add buffer to current time
     query_end_time = current_time + timedelta(days=1)
-    logger.debug(f"Query end time: {query_end_time}")
+    logger.debug("Query end time: %s", query_end_time)
     
     if date_range and date_range.get('latest'):
-        latest_existing = datetime.fromisoformat(date_range['latest'].replace('Z', '+00:00'))
-        logger.debug(f"Latest existing email time: {latest_existing}")
+        latest_existing = _parse_iso(date_range['latest'])
+        logger.debug("Latest existing email time: %s", latest_existing)
         
         if cutoff_date < latest_existing:
             # Search for older emails
@@ -212,8 +455,8 @@ def construct_date_query(cutoff_date: datetime, date_range: Dict) -> str:
             end_str = query_end_time.strftime('%Y-%m-%d')
             # Create query without time components first
             date_query = f" after:{latest_str}"
-            logger.debug(f"Query start time: {query_start_time}")
-            logger.debug(f"Query parameters - Start: {latest_str}, End: {end_str}")
+            logger.debug("Query start time: %s", query_start_time)
+            logger.debug("Query parameters - Start: %s, End: %s", latest_str, end_str)
             logger.info(f"Searching for new emails with query{date_query}")
             
             return f"{base_query}{date_query}"
@@ -226,49 +469,53 @@ def construct_date_query(cutoff_date: datetime, date_range: Dict) -> str:
         return f"{base_query}{date_query}"
     
 def safe_base64_decode(data):
-    """Safely decode base64 data, handling padding and non-ASCII characters."""
+    """Safely decode base64 data (str or bytes), handling padding and non-ASCII characters."""
     try:
+        # Gmail returns padded URL-safe base64, which decodes in a single call
+        return base64.urlsafe_b64decode(data)
+    except ValueError:
+        logger.debug("Fast base64 decode failed, normalizing data")
+        
+    try:
+        # Work on bytes from here on; base64 is pure ASCII
+        if isinstance(data, str):
+            data = data.encode('ascii', 'ignore')
+            
+        # Map to the standard alphabet and remove whitespace, newlines, stray
+        # padding and anything else outside it, in one C-level pass
+        data = data.translate(_B64_URLSAFE_TABLE, _B64_DELETE)
+        
         # Add padding if necessary
         missing_padding = len(data) % 4
         if missing_padding:
-            data += '=' * (4 - missing_padding)
-            logger.debug(f"Added {4 - missing_padding} padding characters to base64 data")
+            data += b'=' * (4 - missing_padding)
+            logger.debug("Added %s padding characters to base64 data", 4 - missing_padding)
             
-        # Replace URL-safe characters
-        data = data.replace("-", "+").replace("_", "/")
-        
-        # Handle both string and bytes input
-        if isinstance(data, str):
-            # Remove any whitespace and newlines
-            data = ''.join(data.split())
-            
-        decoded_data = base64.b64decode(data)
-        logger.debug("Successfully decoded base64 data")
+        decoded_data = binascii.a2b_base64(data)
         return decoded_data
     except Exception as e:
         logger.error(f"Base64 decoding error: {e}")
         return b''
 
 def decode_content(data, encoding):
-    """Decodes email content based on the specified encoding type."""
+    """Decodes email content (str or bytes) based on the specified encoding type."""
     try:
         if not data:
             logger.debug("Empty data received for decoding")
             return ""
             
-        logger.debug(f"Attempting to decode content with encoding: {encoding}")
         if encoding == 'base64':
             decoded_bytes = safe_base64_decode(data)
             result = decoded_bytes.decode('utf-8', errors='replace')
-            logger.debug("Successfully decoded base64 content")
             return result
         elif encoding == 'quoted-printable':
-            result = quopri.decodestring(data.encode('utf-8', errors='replace')).decode('utf-8', errors='replace')
-            logger.debug("Successfully decoded quoted-printable content")
+            if isinstance(data, str):
+                data = data.encode('utf-8', errors='replace')
+            result = quopri.decodestring(data).decode('utf-8', errors='replace')
             return result
         elif encoding == '7bit' or encoding is None:
             logger.debug("No decoding needed for 7bit/None encoding")
-            return data
+            return data.decode('utf-8', errors='replace') if isinstance(data, bytes) else data
         else:
             logger.warning(f"Unsupported encoding encountered: {encoding}")
             return data
@@ -279,37 +526,43 @@ def decode_content(data, encoding):
 def clean_html_content(html_content):
     """Clean and extract text from HTML content."""
     try:
-        logger.debug("Starting HTML content cleaning")
-        soup = BeautifulSoup(html_content, 'html.parser')
+        tree = LexborHTMLParser(html_content)
         
-        # Remove script and style elements
-        script_style_count = len(soup(["script", "style"]))
-        for element in soup(["script", "style"]):
-            element.decompose()
-        logger.debug(f"Removed {script_style_count} script/style elements")
+        # Remove script and style elements in a single call
+        tree.strip_tags(['script', 'style'])
             
-        # Get text and clean up whitespace
-        text = soup.get_text(separator=' ')
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+        # Get text and collapse whitespace
+        text = ' '.join(tree.root.text(separator=' ').split())
         
-        logger.debug("Successfully cleaned HTML content")
         return text
     except Exception as e:
         logger.error(f"HTML cleaning error: {e}")
         return html_content
 
-def decode_and_extract_text(encoded_body):
-    """Decode base64 content and extract readable text."""
+def decode_and_extract_text(encoded_body, mime_type=None):
+    """
+    Decode base64 content and extract readable text.
+
+    Args:
+        encoded_body: Base64 body data from the Gmail API
+        mime_type: MIME type of the part; when it is not text/html or
+            text/plain the content is sniffed for markup instead
+    """
     try:
-        logger.debug("Starting text extraction from encoded body")
         # First decode from base64
         decoded_bytes = safe_base64_decode(encoded_body)
         decoded_str = decoded_bytes.decode('utf-8', errors='replace')
         
-        # Clean and extract text if it's HTML
-        if re.search(r'<[^>]+>', decoded_str):
+        # Clean and extract text if it's HTML. Trust the part's MIME type; for
+        # anything else a '<' followed later by a '>' is enough to tell
+        if mime_type == 'text/html':
+            is_html = True
+        elif mime_type == 'text/plain':
+            is_html = False
+        else:
+            lt = decoded_str.find('<')
+            is_html = lt != -1 and decoded_str.find('>', lt + 1) != -1
+        if is_html:
             logger.debug("HTML content detected, cleaning HTML")
             text = clean_html_content(decoded_str)
         else:
@@ -317,18 +570,33 @@ def decode_and_extract_text(encoded_body):
             
         # Structure the cleaned text
         structured_content = EmailCleaner.structure_email_body(text)
-        logger.debug("Successfully extracted and structured text content")
         return structured_content
     except Exception as e:
         logger.error(f"Text extraction error: {e}")
         return EmailCleaner.structure_email_body("")
 
+@lru_cache(maxsize=4096)
 def parse_date(date_str):
-    """Parse date string with comprehensive timezone handling."""
+    """Parse date string with comprehensive timezone handling.
+
+    RFC 2822 headers are parsed by email.utils; anything it cannot place in a
+    timezone falls back to the manual parser. Results are cached by header
+    string since bulk senders reuse Date values.
+    """
     if not date_str:
         raise ValueError("Empty date string")
         
-    logger.debug(f"Parsing date string: {date_str!r}")
+    try:
+        parsed = parsedate_to_datetime(date_str)
+        if parsed.tzinfo is not None:
+            return parsed
+    except (TypeError, ValueError):
+        pass
+    return _parse_date_fallback(date_str)
+
+def _parse_date_fallback(date_str):
+    """Parse non-standard date strings, including named and parenthetical timezones."""
+    logger.debug("Parsing date string: %r", date_str)
     
     try:
         # Common timezone mappings
@@ -351,13 +619,13 @@ def parse_date(date_str):
             main_part = parts[0].strip()
             if len(parts) > 1:
                 parenthetical_tz = parts[1].strip(' )')
-                logger.debug(f"Found parenthetical timezone: {parenthetical_tz}")
+                logger.debug("Found parenthetical timezone: %s", parenthetical_tz)
         
-        logger.debug(f"Main part after cleaning: {main_part!r}")
+        logger.debug("Main part after cleaning: %r", main_part)
         
         # Step 2: Handle single-digit days
-        main_part = re.sub(r'(\w{3}), (\d)\b', r'\1, 0\2', main_part)
-        logger.debug(f"After padding days: {main_part!r}")
+        main_part = _PAD_DAY_RE.sub(r'\1, 0\2', main_part)
+        logger.debug("After padding days: %r", main_part)
         
         # Step 3: Split into date and timezone parts
         try:
@@ -369,7 +637,7 @@ def parse_date(date_str):
         # Split into date and timezone
         try:
             date_part, tz_part = main_part.rsplit(None, 1)
-            logger.debug(f"Split into date ({date_part!r}) and timezone ({tz_part!r})")
+            logger.debug("Split into date (%r) and timezone (%r)", date_part, tz_part)
         except ValueError as e:
             logger.error(f"Failed to split date and timezone: {e}")
             raise ValueError(f"Invalid date format: {main_part}")
@@ -377,7 +645,7 @@ def parse_date(date_str):
         # Step 4: Parse base datetime
         try:
             base_dt = datetime.strptime(date_part, "%a, %d %b %Y %H:%M:%S")
-            logger.debug(f"Parsed base datetime: {base_dt}")
+            logger.debug("Parsed base datetime: %s", base_dt)
         except ValueError as e:
             logger.error(f"Failed to parse datetime part: {e}")
             raise
@@ -386,10 +654,10 @@ def parse_date(date_str):
         # First check if we have a named timezone
         if tz_part in tz_mappings:
             tz_part = tz_mappings[tz_part]
-            logger.debug(f"Mapped named timezone to: {tz_part}")
+            logger.debug("Mapped named timezone to: %s", tz_part)
         elif parenthetical_tz in tz_mappings:
             tz_part = tz_mappings[parenthetical_tz]
-            logger.debug(f"Mapped parenthetical timezone to: {tz_part}")
+            logger.debug("Mapped parenthetical timezone to: %s", tz_part)
             
         # Ensure timezone starts with + or -
         if not tz_part.startswith(('+', '-')):
@@ -397,13 +665,13 @@ def parse_date(date_str):
         
         # Parse timezone offset
         try:
-            match = re.match(r'([+-])(\d{2})(\d{2})', tz_part)
+            match = _TZ_RE.match(tz_part)
             if not match:
                 logger.error(f"Invalid timezone format: {tz_part}")
                 raise ValueError(f"Invalid timezone format: {tz_part}")
                 
             sign, hours, minutes = match.groups()
-            logger.debug(f"Timezone components - Sign: {sign}, Hours: {hours}, Minutes: {minutes}")
+            logger.debug("Timezone components - Sign: %s, Hours: %s, Minutes: %s", sign, hours, minutes)
             
             sign_multiplier = -1 if sign == '-' else 1
             offset = timedelta(
@@ -414,7 +682,7 @@ def parse_date(date_str):
             # Create timezone-aware datetime
             tz = timezone(offset)
             result = base_dt.replace(tzinfo=tz)
-            logger.debug(f"Final datetime: {result}")
+            logger.debug("Final datetime: %s", result)
             return result
             
         except Exception as e:
@@ -425,62 +693,107 @@ def parse_date(date_str):
         logger.error(f"Date parsing failed for {date_str!r}: {str(e)}")
         raise
 
-def process_message(gmail_limiter, message):
-    """Process a single message with improved error handling and cutoff date check."""
-    try:
-        msg = gmail_limiter.get_message(message['id'])
-        payload = msg.get('payload', {})
-        headers = payload.get('headers', [])
-        
-        # Extract headers
-        sender = next((h['value'] for h in headers if h['name'] == 'From'), None)
-        date = next((h['value'] for h in headers if h['name'] == 'Date'), None)
-        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), None)
-        
-        logger.debug(f"Processing message - ID: {message['id']}, Subject: {subject!r}")
-        logger.debug(f"Raw date header: {date!r}")
-        
-        # Parse date with error handling
-        msg_date = None
-        if date:
-            try:
-                msg_date = parse_date(date)
-                # Early return if message is before cutoff date
-                if msg_date < CUTOFF_DATE:
-                    logger.debug(f"Message {message['id']} is before cutoff date, skipping")
-                    return {'status': 'cutoff', 'date': msg_date}
-            except ValueError as e:
-                logger.warning(f"Date parsing issue for message {message['id']}: {e}")
-            except Exception as e:
-                logger.error(f"Unexpected error parsing date: {e}", exc_info=True)
+def iter_parts(payload):
+    """
+    Yield every part nested under a message payload, depth first in document order.
+
+    Newsletters commonly nest multipart/alternative inside multipart/mixed
+    (or multipart/related), so the text parts are not always at the top level.
+    """
+    stack = list(reversed(payload.get('parts', [])))
+    while stack:
+        part = stack.pop()
+        yield part
+        stack.extend(reversed(part.get('parts', [])))
+
+def read_headers(msg):
+    """
+    Extract the From, Date and Subject headers and apply the cutoff and sender checks.
+
+    Returns:
+        Tuple of (status, sender, date, subject, parsed date), where status is
+        'cutoff', 'skipped' or 'matched'
+    """
+    headers = msg.get('payload', {}).get('headers', [])
+    
+    # Extract headers; built in reverse so the first occurrence of a repeated header wins
+    header_values = {h['name']: h['value'] for h in reversed(headers)}
+    sender = header_values.get('From')
+    date = header_values.get('Date')
+    subject = header_values.get('Subject')
+    
+    logger.debug("Processing message - ID: %s, Subject: %r", msg['id'], subject)
+    logger.debug("Raw date header: %r", date)
+    
+    # Parse date with error handling
+    msg_date = None
+    if date:
+        try:
+            msg_date = parse_date(date)
+            # Early return if message is before cutoff date
+            if msg_date < CUTOFF_DATE:
+                logger.debug("Message %s is before cutoff date, skipping", msg['id'])
+                return 'cutoff', sender, date, subject, msg_date
+        except ValueError as e:
+            logger.warning(f"Date parsing issue for message {msg['id']}: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error parsing date: {e}", exc_info=True)
+    
+    # Filter based on sender
+    if not is_filtered_sender(sender):
+        logger.debug("Sender %s not in filter list, skipping", sender)
+        return 'skipped', sender, date, subject, msg_date
         
-        # Filter based on sender
-        if not any(email in (sender or '') for email in FILTER_SENDERS):
-            logger.debug(f"Sender {sender} not in filter list, skipping")
+    logger.debug("Matched sender filter: %s", sender)
+    return 'matched', sender, date, subject, msg_date
+
+def parse_messages(messages):
+    """
+    Parse a batch of fetched messages, in parallel when more than one core is available.
+
+    Args:
+        messages: Dict mapping message id to message resource
+
+    Returns:
+        Dict mapping message id to the parse_message result
+    """
+    if PARSE_WORKERS < 2 or len(messages) < 2:
+        return {msg_id: parse_message(msg) for msg_id, msg in messages.items()}
+    with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as executor:
+        return dict(zip(messages, executor.map(parse_message, messages.values())))
+
+def parse_message(msg):
+    """Process an already-fetched message with improved error handling and cutoff date check."""
+    try:
+        status, sender, date, subject, msg_date = read_headers(msg)
+        if status == 'cutoff':
+            return {'status': 'cutoff', 'date': msg_date}
+        if status == 'skipped':
             return None
-            
-        logger.debug(f"Matched sender filter: {sender}")
         
         # Process message body
+        payload = msg.get('payload', {})
         decoded_body = ""
         parts = payload.get('parts', [])
         
         # Get body content
         if not parts and payload.get('body', {}).get('data'):
             logger.debug("Extracting body from payload directly")
-            decoded_body = decode_and_extract_text(payload['body']['data'])
+            decoded_body = decode_and_extract_text(payload['body']['data'], payload.get('mimeType'))
         else:
-            logger.debug(f"Processing {len(parts)} message parts")
-            for part in parts:
-                mime_type = part.get('mimeType')
-                if mime_type in ['text/plain', 'text/html']:
-                    logger.debug(f"Processing part with MIME type: {mime_type}")
-                    body_data = part['body'].get('data', '')
-                    if body_data:
-                        decoded_body = decode_and_extract_text(body_data)
-                        if decoded_body:
-                            logger.debug("Successfully extracted body content")
-                            break
+            # Prefer the plain-text alternative, which skips HTML parsing; the
+            # HTML part is only decoded when no plain text yields any content
+            text_parts = [part for part in iter_parts(payload) if part.get('mimeType') in ('text/plain', 'text/html')]
+            logger.debug("Found %s text parts", len(text_parts))
+            text_parts.sort(key=lambda part: part['mimeType'] != 'text/plain')
+            for part in text_parts:
+                mime_type = part['mimeType']
+                logger.debug("Processing part with MIME type: %s", mime_type)
+                body_data = part.get('body', {}).get('data', '')
+                if body_data:
+                    decoded_body = decode_and_extract_text(body_data, mime_type)
+                    if decoded_body['clean_text']:
+                        break
         
         # Build result dictionary
         result = {
@@ -505,13 +818,19 @@ def process_message(gmail_limiter, message):
         return result
         
     except Exception as e:
-        logger.error(f"Error processing message {message['id']}: {e}", exc_info=True)
+        logger.error(f"Error processing message {msg.get('id')}: {e}", exc_info=True)
         return None
     
 def main():
     """Main function with proper cutoff handling, logging, and date range updates."""
     logger.info(f"Starting Gmail filtering process with cutoff date: {CUTOFF_DATE.isoformat()}")
     
+    # Without filter senders the list query is unfiltered and every message
+    # would be fetched only to be rejected
+    if not FILTER_SENDERS:
+        logger.error("No filter senders configured; nothing to fetch")
+        return
+    
     # Initialize handlers and get stats
     email_handler = IncrementalEmailHandler()
     stats = email_handler.get_statistics()
@@ -520,8 +839,8 @@ def main():
     # Handle date range
     date_range = stats.get('date_range', {})
     if date_range and date_range.get('earliest') and date_range.get('latest'):
-        earliest_existing = datetime.fromisoformat(date_range['earliest'].replace('Z', '+00:00'))
-        latest_existing = datetime.fromisoformat(date_range['latest'].replace('Z', '+00:00'))
+        earliest_existing = _parse_iso(date_range['earliest'])
+        latest_existing = _parse_iso(date_range['latest'])
         logger.info(f"Found existing emails from {earliest_existing} to {latest_existing}")
     
     # Initialize tracking variables
@@ -543,7 +862,7 @@ def main():
             "successful": 0,
             "skipped": 0,
             "errors": 0,
-            "direction": "backward" if (date_range and CUTOFF_DATE < datetime.fromisoformat(date_range['earliest'].replace('Z', '+00:00'))) else "forward"
+            "direction": "backward" if (date_range and CUTOFF_DATE < _parse_iso(date_range['earliest'])) else "forward"
         },
         "errors": []
     }
@@ -552,10 +871,25 @@ def main():
 
         # Handle credentials
         creds = None
-        if os.path.exists('token.pickle'):
-            logger.info("Loading existing credentials from token.pickle")
+        if os.path.exists('token.json'):
+            logger.info("Loading existing credentials from token.json")
+            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+        elif os.path.exists('token.pickle'):
+            # One-time migration from the pickled credentials older versions saved
+            logger.info("Migrating credentials from token.pickle to token.json")
             with open('token.pickle', 'rb') as token:
-                creds = pickle.load(token)
+                legacy_creds = pickle.load(token)
+            with open('token.json', 'w') as token:
+                token.write(legacy_creds.to_json())
+            try:
+                creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+            except ValueError as e:
+                # Keep the pickle, the only working copy, and drop the unusable
+                # JSON so a later run can retry the migration
+                logger.error(f"Migrated token.json could not be loaded, keeping token.pickle: {e}")
+                os.remove('token.json')
+            else:
+                os.remove('token.pickle')
                 
         if not creds or not creds.valid:
             logger.info("Obtaining new credentials")
@@ -567,9 +901,9 @@ def main():
                 flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
                 creds = flow.run_local_server(port=0)
                 
-            logger.info("Saving new credentials to token.pickle")
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
+            logger.info("Saving new credentials to token.json")
+            with open('token.json', 'w') as token:
+                token.write(creds.to_json())
                 
         # Build Gmail API service
         logger.info("Building Gmail API service")
@@ -592,16 +926,40 @@ def main():
                     logger.info('No more messages found')
                     break
                     
+                # Messages are fetched lazily, BATCH_SIZE at a time, so a cutoff
+                # part-way through the page doesn't pay for the rest of it
+                pending_ids = [m['id'] for m in messages if m['id'] not in processed_ids]
+                pending_batches = (
+                    pending_ids[i:i + BATCH_SIZE]
+                    for i in range(0, len(pending_ids), BATCH_SIZE)
+                )
+                requested_ids = set()
+                parsed = {}
+                batch_errors = {}
+                    
                 for message in messages:
                     try:
                         # Skip duplicates
                         if message['id'] in processed_ids:
-                            logger.debug(f"Skipping duplicate message {message['id']}")
+                            logger.debug("Skipping duplicate message %s", message['id'])
                             logs["stats"]["skipped"] += 1
                             continue
                             
+                        if message['id'] not in requested_ids:
+                            batch_ids = next(pending_batches)
+                            requested_ids.update(batch_ids)
+                            try:
+                                parsed.update(parse_messages(gmail_limiter.get_messages(batch_ids)))
+                            except Exception as e:
+                                # Keep the failure for every id in the batch so the
+                                # rest aren't miscounted as skipped when reached
+                                batch_errors.update(dict.fromkeys(batch_ids, f"Batch fetch failed: {e}"))
+                        
+                        if message['id'] in batch_errors:
+                            raise RuntimeError(batch_errors.pop(message['id']))
+                            
                         # Process message
-                        processed_message = process_message(gmail_limiter, message)
+                        processed_message = parsed.pop(message['id'], None)
                         message_log = {
                             "time": datetime.now().isoformat(),
                             "message_id": message['id'],
@@ -651,9 +1009,6 @@ def main():
                         })
                         logs["stats"]["errors"] += 1
                         continue
-                        
-                    # Rate limiting delay
-                    time.sleep(0.5)
                     
                 if cutoff_reached:
                     logger.info("Cutoff date reached. Stopping processing.")
@@ -664,9 +1019,6 @@ def main():
                 if not page_token:
                     logger.info("No more pages available")
                     break
-                    
-                # Add delay between pages
-                time.sleep(BATCH_DELAY)
                 
             except Exception as e:
                 error_msg = f"Error processing page: {str(e)}"
@@ -698,29 +1050,19 @@ def main():
                 logger.info("Starting MongoDB import process")
                 mongo_loader = MongoDBLoader()
                 if mongo_loader.connect():
-                    # Get MongoDB stats before update
-                    before_stats = mongo_loader.get_collection_stats()
-                    logger.info(f"MongoDB before update: {before_stats['total_documents']} documents")
-                    
-                    # Import new emails
-                    mongo_stats = mongo_loader.load_data(filtered_emails)
+                    # Import new emails; the import stats report what was inserted
+                    mongo_stats = mongo_loader.load_data(filtered_emails, batch_size=MONGO_BULK_SIZE)
                     logger.info(f"MongoDB import completed. Stats: {mongo_stats}")
                     
-                    # Get MongoDB stats after update
-                    after_stats = mongo_loader.get_collection_stats()
-                    logger.info(f"MongoDB after update: {after_stats['total_documents']} documents")
-                    
                     # Verify the changes
-                    if after_stats['total_documents'] > before_stats['total_documents']:
-                        logger.info(f"Successfully added {after_stats['total_documents'] - before_stats['total_documents']} new documents to MongoDB")
+                    if mongo_stats['successful'] > 0:
+                        logger.info(f"Successfully added {mongo_stats['successful']} new documents to MongoDB")
                     else:
                         logger.warning("No new documents were added to MongoDB")
                     
                     # Add MongoDB stats to logs
                     logs["stats"]["mongodb"] = {
-                        "import_stats": mongo_stats,
-                        "before_count": before_stats['total_documents'],
-                        "after_count": after_stats['total_documents']
+                        "import_stats": mongo_stats
                     }
                 else:
                     logger.error("Failed to connect to MongoDB")
@@ -739,8 +1081,7 @@ def main():
                 
             # Save processing logs
             logger.info("Saving processing logs")
-            with open('gmail_processing_logs.json', 'w', encoding='utf-8') as logfile:
-                json.dump(logs, logfile, indent=4, ensure_ascii=False)
+            save_processing_logs(logs)
                 
             logger.info(f"Process completed. Stats: {logs['stats']}")
             
@@ -768,8 +1109,7 @@ def main():
                 "message": error_msg
             })
             # Try to save logs even if results save failed
-            with open('gmail_processing_logs.json', 'w', encoding='utf-8') as logfile:
-                json.dump(logs, logfile, indent=4, ensure_ascii=False)
+            save_processing_logs(logs)
 
     except Exception as e:
         error_msg = f"Fatal error in main: {str(e)}"
@@ -779,8 +1119,7 @@ def main():
             "type": "fatal_error",
             "message": error_msg
         })
-        with open('gmail_processing_logs.json', 'w', encoding='utf-8') as logfile:
-            json.dump(logs, logfile, indent=4, ensure_ascii=False)
+        save_processing_logs(logs)
         raise
     
 if __name__ == '__main__':
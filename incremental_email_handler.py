@@ -1,8 +1,10 @@
 import os
-import json
+import shutil
 import logging
+import orjson
 from datetime import datetime
-from typing import Dict, List, Set, Optional
+from typing import Dict, Iterable, Iterator, List, Set, Optional
+from collections import Counter
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -25,6 +27,75 @@ class EmailMetadata:
             subject=email_dict.get('subject', '')
         )
 
+def atomic_write_chunks(path: str, chunks: Iterable[bytes]) -> None:
+    """
+    Replace a file's contents atomically, writing them piece by piece.
+
+    The chunks are written and fsynced to a temporary file next to the target,
+    which is then renamed over it, so a crash mid-write leaves the previous
+    file intact instead of a truncated one. The whole new contents are never
+    held in memory at once.
+    
+    Args:
+        path: File to write
+        chunks: Byte strings making up the new contents, in order
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Don't leave a partial temp file behind; the original is untouched
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def iter_json_array(items: List[Dict], option: int = 0) -> Iterator[bytes]:
+    """
+    Serialize a list as a JSON array one element at a time.
+
+    Produces the same bytes as orjson.dumps(items, option=option |
+    orjson.OPT_INDENT_2), but only one serialized element is alive at a time.
+    
+    Args:
+        items: Elements of the array
+        option: Extra orjson options (OPT_INDENT_2 is always applied)
+    """
+    if not items:
+        yield b'[]'
+        return
+    option |= orjson.OPT_INDENT_2
+    yield b'[\n  '
+    for index, item in enumerate(items):
+        if index:
+            yield b',\n  '
+        # Serialized JSON has no raw newlines inside strings, so indenting every
+        # line nests the element one level into the array
+        yield orjson.dumps(item, option=option).replace(b'\n', b'\n  ')
+    yield b'\n]'
+
+def email_sort_key(email: Dict) -> float:
+    """
+    Sort key for an email: its parsedDate as a POSIX timestamp.
+
+    Comparing timestamps orders emails sent from different UTC offsets
+    correctly, which comparing the ISO strings does not. Emails without a
+    usable parsedDate sort as the oldest.
+    """
+    date = email.get('parsedDate')
+    if not date:
+        return float('-inf')
+    try:
+        return datetime.fromisoformat(date).timestamp()
+    except ValueError:
+        return float('-inf')
+
 class IncrementalEmailHandler:
     """Handles incremental updates to email collection."""
     
@@ -38,15 +109,25 @@ class IncrementalEmailHandler:
         self.json_path = json_path
         self.existing_emails: List[Dict] = []
         self.existing_ids: Set[str] = set()
+        # Date range and sender counts of existing_emails, kept up to date on load and merge
+        self._earliest_date: Optional[str] = None
+        self._latest_date: Optional[str] = None
+        self._earliest_key = self._latest_key = float('-inf')
+        self._sender_counts: Counter = Counter()
         self.load_existing_data()
         
     def load_existing_data(self) -> None:
         """Load existing email data from JSON file."""
         try:
             if os.path.exists(self.json_path):
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    self.existing_emails = json.load(f)
-                    self.existing_ids = {email['id'] for email in self.existing_emails}
+                self.existing_emails = orjson.loads(Path(self.json_path).read_bytes())
+                self.existing_ids = set()
+                self._earliest_date = self._latest_date = None
+                self._earliest_key = self._latest_key = float('-inf')
+                self._sender_counts = Counter()
+                for email in self.existing_emails:
+                    self.existing_ids.add(email['id'])
+                    self._track_email(email)
                 logger.info(f"Loaded {len(self.existing_emails)} existing emails")
             else:
                 logger.info("No existing email file found. Starting fresh.")
@@ -54,6 +135,18 @@ class IncrementalEmailHandler:
             logger.error(f"Error loading existing emails: {e}")
             raise
 
+    def _track_email(self, email: Dict) -> None:
+        """Add an email to the cached date range and sender counts."""
+        self._sender_counts[email.get('from', 'Unknown')] += 1
+        # Compare timestamps, not the ISO strings, so mixed UTC offsets order correctly
+        key = email_sort_key(email)
+        if key == float('-inf'):
+            return
+        if self._earliest_date is None or key < self._earliest_key:
+            self._earliest_date, self._earliest_key = email['parsedDate'], key
+        if self._latest_date is None or key > self._latest_key:
+            self._latest_date, self._latest_key = email['parsedDate'], key
+
     def backup_existing_file(self) -> None:
         """Create a backup of the existing JSON file."""
         if os.path.exists(self.json_path):
@@ -64,9 +157,8 @@ class IncrementalEmailHandler:
             backup_path = backup_dir / f"filtered_emails_{timestamp}.json"
             
             try:
-                with open(self.json_path, 'r', encoding='utf-8') as source:
-                    with open(backup_path, 'w', encoding='utf-8') as target:
-                        json.dump(json.load(source), target, indent=4)
+                # The file is already valid JSON, so copy it rather than re-serializing
+                shutil.copyfile(self.json_path, backup_path)
                 logger.info(f"Created backup at {backup_path}")
             except Exception as e:
                 logger.error(f"Error creating backup: {e}")
@@ -76,53 +168,57 @@ class IncrementalEmailHandler:
         """
         Merge new emails with existing ones, avoiding duplicates.
         
+        The existing email list is extended in place rather than copied. The
+        cached date range and sender counts are only updated by
+        process_new_emails once the merged emails are saved.
+        
         Args:
             new_emails: List of new email dictionaries to merge
             
         Returns:
-            List of merged emails
+            List of merged emails (the handler's own existing_emails list)
         """
-        merged = self.existing_emails.copy()
-        new_count = 0
+        new_only = []
         duplicate_count = 0
         
-        # Create lookup for faster comparison
-        existing_lookup = {
-            email['id']: EmailMetadata.from_email_dict(email)
-            for email in self.existing_emails
-        }
-        
         for email in new_emails:
-            if email['id'] not in existing_lookup:
-                merged.append(email)
-                new_count += 1
+            if email['id'] not in self.existing_ids:
+                new_only.append(email)
+                # Track the id so repeats later in the batch count as duplicates
+                self.existing_ids.add(email['id'])
             else:
                 duplicate_count += 1
                 
-        logger.info(f"Merged {new_count} new emails (skipped {duplicate_count} duplicates)")
-        return merged
+        self.existing_emails.extend(new_only)
+        logger.info(f"Merged {len(new_only)} new emails (skipped {duplicate_count} duplicates)")
+        return self.existing_emails
 
     def save_merged_emails(self, merged_emails: List[Dict]) -> None:
         """
         Save merged emails to JSON file.
         
         Args:
-            merged_emails: List of all emails to save
+            merged_emails: List of all emails to save; sorted in place
         """
         try:
             # Create backup before saving
             self.backup_existing_file()
             
-            # Sort emails by date before saving
-            sorted_emails = sorted(
-                merged_emails,
-                key=lambda x: x.get('parsedDate', ''),
+            # Sort emails by date before saving. The list is already sorted
+            # apart from the newly appended emails, which Timsort handles in
+            # close to a single pass
+            merged_emails.sort(
+                key=email_sort_key,
                 reverse=True  # Most recent first
             )
             
-            with open(self.json_path, 'w', encoding='utf-8') as f:
-                json.dump(sorted_emails, f, indent=4, ensure_ascii=False)
-            logger.info(f"Saved {len(sorted_emails)} emails to {self.json_path}")
+            # Stream the array out one email at a time rather than building
+            # the whole serialized archive in memory
+            atomic_write_chunks(
+                self.json_path,
+                iter_json_array(merged_emails, orjson.OPT_NON_STR_KEYS)
+            )
+            logger.info(f"Saved {len(merged_emails)} emails to {self.json_path}")
             
         except Exception as e:
             logger.error(f"Error saving merged emails: {e}")
@@ -142,10 +238,26 @@ class IncrementalEmailHandler:
             logger.info(f"Processing {len(new_emails)} new emails")
             
             # Merge emails
+            existing_count = len(self.existing_emails)
             merged_emails = self.merge_emails(new_emails)
+            new_only = merged_emails[existing_count:]
             
             # Save merged result
-            self.save_merged_emails(merged_emails)
+            try:
+                self.save_merged_emails(merged_emails)
+            except Exception:
+                # Roll back so the handler keeps matching the file on disk. The
+                # save sorts the list in place, so drop the new emails by id
+                # rather than by position
+                new_ids = {email['id'] for email in new_only}
+                self.existing_ids -= new_ids
+                self.existing_emails[:] = [
+                    email for email in self.existing_emails if email['id'] not in new_ids
+                ]
+                raise
+            
+            for email in new_only:
+                self._track_email(email)
             
             return merged_emails
             
@@ -160,16 +272,7 @@ class IncrementalEmailHandler:
         Returns:
             ISO format date string or None if no existing emails
         """
-        if not self.existing_emails:
-            return None
-            
-        dates = [
-            email.get('parsedDate') 
-            for email in self.existing_emails 
-            if email.get('parsedDate')
-        ]
-        
-        return max(dates) if dates else None
+        return self._latest_date
 
     def get_statistics(self) -> Dict:
         """
@@ -185,28 +288,13 @@ class IncrementalEmailHandler:
                 "senders": {}
             }
             
-        dates = [
-            email.get('parsedDate') 
-            for email in self.existing_emails 
-            if email.get('parsedDate')
-        ]
-        
-        senders = {}
-        for email in self.existing_emails:
-            sender = email.get('from', 'Unknown')
-            senders[sender] = senders.get(sender, 0) + 1
-            
         return {
             "total_emails": len(self.existing_emails),
             "date_range": {
-                "earliest": min(dates) if dates else None,
-                "latest": max(dates) if dates else None
+                "earliest": self._earliest_date,
+                "latest": self._latest_date
             },
-            "senders": dict(sorted(
-                senders.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:5])
+            "senders": dict(self._sender_counts.most_common(5))
         }
 
 def main():
@@ -1,16 +1,27 @@
 import os
-import json
+import atexit
 import logging
+import threading
+import importlib.util
+import orjson
+import bson
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sized
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from pymongo.errors import ConnectionFailure, OperationFailure
 from pymongo.collection import Collection
+from pymongo.write_concern import WriteConcern
+from pymongo import IndexModel, UpdateOne
 from dotenv import load_dotenv
 import warnings
 from functools import wraps
 
+try:
+    import ijson
+except ImportError:  # Optional: only needed to stream very large JSON files
+    ijson = None
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -18,6 +29,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Newsletter imports are re-runnable, so bulk inserts skip waiting on the
+# journal. Writes stay acknowledged (w=1) so the import stats remain accurate.
+BULK_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Single-field indexes created by earlier versions, dropped on initialization
+LEGACY_INDEXES = ('from_1', 'subject_1')
+
+# JSON files at least this large are streamed with ijson (when installed)
+# instead of being parsed into memory in one go
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+# Batches are also flushed by approximate size, well under MongoDB's 48 MB
+# message limit, so a run of long newsletters doesn't build oversized batches
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+# Load progress is logged once every this many batches rather than per batch
+PROGRESS_LOG_INTERVAL = 10
+
+# Email bodies are plain text and compress well on the wire. zlib ships with
+# Python; zstd and snappy are preferred when their packages are installed.
+COMPRESSORS = ','.join(
+    name for name, module in (('zstd', 'zstandard'), ('snappy', 'snappy'), ('zlib', 'zlib'))
+    if importlib.util.find_spec(module)
+)
+
+# MongoClient is thread-safe and keeps its own connection pool, so every loader
+# in the process shares one client per URI instead of paying for DNS lookup,
+# TLS handshake and topology discovery on each connect()
+_clients: Dict[str, MongoClient] = {}
+_clients_lock = threading.Lock()
+
+# (uri, db_name, collection_name) combinations whose indexes were already
+# set up in this process
+_initialized_collections = set()
+
+def get_client(uri: str) -> MongoClient:
+    """Return the shared MongoClient for a URI, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(uri)
+        if client is None:
+            client = MongoClient(uri, server_api=ServerApi('1'), compressors=COMPRESSORS)
+            _clients[uri] = client
+        return client
+
+@atexit.register
+def close_clients():
+    """Close every shared MongoClient. Registered to run at interpreter exit."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _initialized_collections.clear()
+
 def deprecated(func):
     """Decorator to mark functions as deprecated."""
     @wraps(func)
@@ -44,7 +108,9 @@ class MongoDBLoader:
     def connect(self) -> bool:
         try:
             logger.info("Attempting to connect to MongoDB...")
-            self.client = MongoClient(self.uri, server_api=ServerApi('1'))
+            if not bson.has_c():
+                logger.warning("pymongo C extensions are not available; BSON encoding will be slow")
+            self.client = get_client(self.uri)
             # Test connection
             self.client.admin.command('ping')
             logger.info("Successfully connected to MongoDB")
@@ -56,6 +122,23 @@ class MongoDBLoader:
             logger.error(f"Unexpected error connecting to MongoDB: {str(e)}")
             return False
 
+    def use_collection(self, db_name: str = 'gmail_archive',
+                       collection_name: str = 'emails') -> Collection:
+        """
+        Bind the loader to a database and collection without touching its indexes.
+
+        For read-only callers such as progress checks; initialize_database also
+        sets up the indexes.
+
+        Returns:
+            The bound collection
+        """
+        if self.client is None:
+            raise ConnectionError("No MongoDB connection available")
+        self.db = self.client[db_name]
+        self.collection = self.db[collection_name]
+        return self.collection
+
     def initialize_database(self, db_name: str = 'gmail_archive', 
                           collection_name: str = 'emails') -> None:
         """Initialize database and collection."""
@@ -64,30 +147,53 @@ class MongoDBLoader:
                 logger.error("Cannot initialize database: No MongoDB connection available")
                 raise ConnectionError("No MongoDB connection available")
             
+            self.use_collection(db_name, collection_name)
+            
+            # Indexes only need setting up once per process; later calls (e.g.
+            # repeated load_data runs from the background processor) just
+            # rebind the collection
+            init_key = (self.uri, db_name, collection_name)
+            if init_key in _initialized_collections:
+                return True
+            
             logger.info(f"Initializing database '{db_name}' and collection '{collection_name}'")
-            self.db = self.client[db_name]
-            self.collection = self.db[collection_name]
             
-            # Create indexes
+            # Every index is updated on each insert, so only keep the ones
+            # queries use: id for dedup and parsedDate for date-range sorts.
+            # Nothing filters or sorts on from or subject; the per-sender
+            # counts are $group scans that an index doesn't help.
+            existing_indexes = self.collection.index_information()
+            for legacy_index in LEGACY_INDEXES:
+                if legacy_index in existing_indexes:
+                    logger.info(f"Dropping unused index {legacy_index}")
+                    self.collection.drop_index(legacy_index)
+            
+            # Create indexes in a single createIndexes command; indexes that
+            # already exist are left as they are by the server
             logger.info("Creating indexes...")
-            index_results = []
-            index_results.append(self.collection.create_index([('id', 1)], unique=True))
-            index_results.append(self.collection.create_index([('parsedDate', -1)]))
-            index_results.append(self.collection.create_index([('from', 1)]))
-            index_results.append(self.collection.create_index([('subject', 1)]))
+            index_results = self.collection.create_indexes([
+                IndexModel([('id', 1)], unique=True),
+                IndexModel([('parsedDate', -1)])
+            ])
             
             logger.info(f"Successfully created indexes: {index_results}")
-            logger.info(f"Collection stats: {self.db.command('collstats', collection_name)}")
 
+            _initialized_collections.add(init_key)
             return True
             
         except Exception as e:
             logger.error(f"Failed to initialize database: {str(e)}", exc_info=True)
             raise
 
-    def load_data(self, data, batch_size: int = 100) -> Dict:
+    def load_data(self, data, batch_size: int = 1000) -> Dict:
         """
         Load email data into MongoDB.
+
+        Args:
+            data: Path to a JSON file, or any iterable of email dictionaries
+                (e.g. the in-memory list from gmailextract, avoiding a file round-trip)
+            batch_size: Maximum number of documents sent per bulk write; a batch
+                is also sent early once it reaches MAX_BATCH_BYTES of JSON
         """
         stats = {
             'total_processed': 0,
@@ -99,47 +205,72 @@ class MongoDBLoader:
             'errors': []  # Track specific errors
         }
         
+        source = None
         try:
             # Handle input data
             if isinstance(data, str):
-                logger.info(f"Reading email data from file: {data}")
-                with open(data, 'r', encoding='utf-8') as f:
-                    emails = json.load(f)
+                logger.info("Reading email data from file: %s", data)
+                if ijson is not None and os.path.getsize(data) >= STREAM_THRESHOLD_BYTES:
+                    # Stream one email at a time so memory stays bounded by the batch
+                    logger.info("Large file, streaming emails with ijson")
+                    source = open(data, 'rb')
+                    emails = ijson.items(source, 'item', use_float=True)
+                else:
+                    with open(data, 'rb') as f:
+                        emails = orjson.loads(f.read())
             elif isinstance(data, list):
-                logger.info(f"Processing provided email list (length: {len(data)})")
+                logger.info("Processing provided email list (length: %d)", len(data))
+                emails = data
+            elif isinstance(data, Iterable) and not isinstance(data, (dict, bytes)):
+                logger.info("Processing provided email iterable")
                 emails = data
             else:
-                raise ValueError(f"Invalid data type: {type(data)}. Must be str or list.")
+                raise ValueError(f"Invalid data type: {type(data)}. Must be str or an iterable of dicts.")
 
             # Log sample of first email for debugging
-            if emails:
-                logger.debug(f"Sample email structure: {list(emails[0].keys())}")
+            if isinstance(emails, list) and emails:
+                logger.debug("Sample email structure: %s", list(emails[0].keys()))
                 
             # Initialize database
             logger.info("Initializing database...")
             self.initialize_database()
             logger.info("Database initialization complete")
+            bulk_collection = self.collection.with_options(write_concern=BULK_WRITE_CONCERN)
                 
-            # Process emails in batches
-            total_batches = len(emails) // batch_size + (1 if len(emails) % batch_size else 0)
-            logger.info(f"Processing {len(emails)} emails in {total_batches} batches (size: {batch_size})")
+            # Process emails in batches bounded by count and by size
+            max_batch_mb = MAX_BATCH_BYTES // (1024 * 1024)
+            if isinstance(emails, Sized):
+                logger.info("Processing %d emails in batches of up to %d documents or %d MB",
+                            len(emails), batch_size, max_batch_mb)
+            else:
+                logger.info("Processing streamed emails in batches of up to %d documents or %d MB",
+                            batch_size, max_batch_mb)
             
             batch = []
+            batch_bytes = 0
             current_batch = 0
+            # One import timestamp for the whole load
+            imported_at = datetime.now().isoformat()
             
             for idx, email in enumerate(emails):
                 try:
                     # Add metadata
-                    email['_imported_at'] = datetime.now().isoformat()
+                    email['_imported_at'] = imported_at
                     batch.append(email)
+                    batch_bytes += len(orjson.dumps(email, default=str))
                     stats['total_processed'] += 1
                     
                     # Process batch
-                    if len(batch) >= batch_size:
+                    if len(batch) >= batch_size or batch_bytes >= MAX_BATCH_BYTES:
                         current_batch += 1
-                        logger.info(f"Processing batch {current_batch}/{total_batches}")
-                        self._process_batch(batch, stats)
+                        logger.debug("Processing batch %d (%d emails, ~%d KB)",
+                                     current_batch, len(batch), batch_bytes // 1024)
+                        self._process_batch(batch, stats, bulk_collection)
+                        if current_batch % PROGRESS_LOG_INTERVAL == 0:
+                            logger.info("Progress: %d batches, %d emails processed, %d inserted",
+                                        current_batch, stats['total_processed'], stats['successful'])
                         batch = []
+                        batch_bytes = 0
                         
                 except Exception as e:
                     error_msg = f"Error processing email {idx}: {str(e)}"
@@ -150,21 +281,23 @@ class MongoDBLoader:
             # Process remaining emails
             if batch:
                 current_batch += 1
-                logger.info(f"Processing final batch {current_batch}/{total_batches}")
-                self._process_batch(batch, stats)
+                logger.debug("Processing final batch %d (%d emails, ~%d KB)",
+                             current_batch, len(batch), batch_bytes // 1024)
+                self._process_batch(batch, stats, bulk_collection)
                 
             stats['end_time'] = datetime.now().isoformat()
             
             # Log final statistics
             logger.info("Email loading completed. Final stats:")
-            logger.info(f"  Total processed: {stats['total_processed']}")
-            logger.info(f"  Successful: {stats['successful']}")
-            logger.info(f"  Failed: {stats['failed']}")
-            logger.info(f"  Duplicates: {stats['duplicates']}")
+            logger.info("  Batches: %d", current_batch)
+            logger.info("  Total processed: %d", stats['total_processed'])
+            logger.info("  Successful: %d", stats['successful'])
+            logger.info("  Failed: %d", stats['failed'])
+            logger.info("  Duplicates: %d", stats['duplicates'])
             if stats['errors']:
                 logger.info("Errors encountered:")
                 for error in stats['errors'][:5]:  # Show first 5 errors
-                    logger.info(f"  - {error}")
+                    logger.info("  - %s", error)
             
             return stats
             
@@ -174,12 +307,17 @@ class MongoDBLoader:
             stats['errors'].append(error_msg)
             stats['end_time'] = datetime.now().isoformat()
             return stats
+        finally:
+            if source is not None:
+                source.close()
     
     def get_collection_stats(self) -> Dict:
         """Get current statistics of the MongoDB collection."""
         try:
+            # Reading stats must not change the schema, so bind the collection
+            # without the index setup initialize_database does
             if self.collection is None:  # Correct comparison with None
-                self.initialize_database()
+                self.use_collection()
 
             stats = {
                 'total_documents': self.collection.count_documents({}),
@@ -215,30 +353,56 @@ class MongoDBLoader:
             logger.error(f"Error getting collection stats: {e}")
             return None
     
-    def _process_batch(self, batch: List[Dict], stats: Dict) -> None:
-        """Process a batch of emails."""
+    def _process_batch(self, batch: List[Dict], stats: Dict,
+                       collection: Optional[Collection] = None) -> None:
+        """
+        Process a batch of emails.
+        
+        Ids already in the collection are looked up first with an index-only
+        query, so their (large) documents are never sent. The rest are upserted
+        with $setOnInsert keyed on id, which also leaves any email inserted in
+        the meantime untouched and counts it as a duplicate.
+        """
         try:
-            logger.debug(f"Processing batch of {len(batch)} emails")
-            result = self.collection.insert_many(batch, ordered=False)
-            inserted_count = len(result.inserted_ids)
+            logger.debug("Processing batch of %d emails", len(batch))
+            collection = self.collection if collection is None else collection
+            existing_ids = {
+                doc['id'] for doc in collection.find(
+                    {'id': {'$in': [email['id'] for email in batch]}},
+                    {'id': 1, '_id': 0}
+                )
+            }
+            operations = [
+                UpdateOne({'id': email['id']}, {'$setOnInsert': email}, upsert=True)
+                for email in batch
+                if email['id'] not in existing_ids
+            ]
+            inserted_count = 0
+            if operations:
+                result = collection.bulk_write(operations, ordered=False)
+                inserted_count = result.upserted_count
             stats['successful'] += inserted_count
-            logger.info(f"Successfully inserted {inserted_count} documents")
+            stats['duplicates'] += len(batch) - inserted_count
+            logger.debug("Inserted %d documents, skipped %d already in the collection",
+                         inserted_count, len(batch) - inserted_count)
             
         except OperationFailure as e:
+            # Concurrent upserts of the same id can still collide on the unique index
             if "duplicate key error" in str(e):
                 # Get detailed error information
                 if hasattr(e, 'details'):
-                    successful = e.details.get('nInserted', 0)
+                    successful = e.details.get('nUpserted', 0)
                     write_errors = e.details.get('writeErrors', [])
                     stats['successful'] += successful
                     stats['duplicates'] += len(batch) - successful
                     
                     # Log specific duplicate key errors
                     for error in write_errors[:5]:  # Log first 5 errors
-                        logger.warning(f"Duplicate key error: {error.get('errmsg', 'Unknown error')}")
+                        logger.warning("Duplicate key error: %s", error.get('errmsg', 'Unknown error'))
                 else:
                     stats['duplicates'] += len(batch)
-                logger.warning(f"Batch processing completed with duplicates. Successful: {stats['successful']}, Duplicates: {stats['duplicates']}")
+                logger.warning("Batch processing completed with duplicates. Successful: %d, Duplicates: %d",
+                               stats['successful'], stats['duplicates'])
             else:
                 error_msg = f"Batch processing error: {str(e)}"
                 logger.error(error_msg)
@@ -252,16 +416,20 @@ class MongoDBLoader:
             stats['failed'] += len(batch)
 
     def close(self):
+        """
+        Detach this loader from MongoDB.
+
+        The underlying client is shared with other loaders in the process, so
+        it stays open for reuse and is closed at exit by close_clients().
+        """
         if self.client is not None:
-            logger.info("Closing MongoDB connection")
-            self.client.close()
             self.client = None
             self.db = None
             self.collection = None
-            logger.info("MongoDB connection closed")
+            logger.info("MongoDB connection released")
     
     @deprecated
-    def load_emails(self, data, batch_size: int = 100) -> Dict:
+    def load_emails(self, data, batch_size: int = 1000) -> Dict:
         """
         Deprecated: Use load_data() instead.
         
@@ -270,6 +438,30 @@ class MongoDBLoader:
         return self.load_data(data, batch_size)
 
 
+_shared_loader: Optional[MongoDBLoader] = None
+_shared_loader_lock = threading.Lock()
+
+def get_loader() -> Optional[MongoDBLoader]:
+    """
+    Return a connected MongoDBLoader shared by the scripts in this process.
+
+    The loader is created and connected on first use and reused afterwards,
+    so scripts run one after another (e.g. the background processor's
+    verification steps) skip reconnecting. Callers should not close it; the
+    client is closed at exit by close_clients().
+
+    Returns:
+        The shared loader, or None if connecting to MongoDB failed
+    """
+    global _shared_loader
+    with _shared_loader_lock:
+        if _shared_loader is None:
+            loader = MongoDBLoader()
+            if not loader.connect():
+                return None
+            _shared_loader = loader
+        return _shared_loader
+
 if __name__ == "__main__":
     # Example usage
     loader = MongoDBLoader()
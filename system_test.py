@@ -73,7 +73,7 @@ class SystemTest:
             
         try:
             # Test basic operations
-            loader.initialize_database()
+            loader.use_collection()
             stats = loader.get_collection_stats()
             if stats:
                 logger.info(f"✓ MongoDB connection test passed (Documents: {stats['total_documents']})")
@@ -0,0 +1,73 @@
+import base64
+from datetime import timezone
+
+import gmailextract
+
+
+def test_sender_matcher_bare_domains():
+    is_filtered_sender = gmailextract.build_sender_matcher(['example.com', '@Example.org'])
+
+    assert is_filtered_sender('news@example.com')
+    assert is_filtered_sender('Daily <Digest@Mail.Example.com>')
+    assert is_filtered_sender('alerts@example.org')
+    assert not is_filtered_sender('news@notexample.com')
+    assert not is_filtered_sender('news@example.com.evil.net')
+    assert not is_filtered_sender(None)
+
+
+def test_sender_matcher_full_addresses():
+    is_filtered_sender = gmailextract.build_sender_matcher(['News@Example.com'])
+
+    assert is_filtered_sender('news@example.com')
+    assert is_filtered_sender('Newsletter <NEWS@example.com>')
+    assert not is_filtered_sender('other@example.com')
+    assert not is_filtered_sender('news@sub.example.com')
+
+
+def test_sender_matcher_mixed_and_empty():
+    is_filtered_sender = gmailextract.build_sender_matcher(['news@example.com', 'brew.com'])
+
+    assert is_filtered_sender('news@example.com')
+    assert is_filtered_sender('morning@brew.com')
+    assert not is_filtered_sender('other@example.com')
+    assert not gmailextract.build_sender_matcher([])('news@example.com')
+
+
+def test_parse_date_is_cached():
+    date_str = 'Tue, 3 Dec 2024 08:30:00 +0100'
+
+    first = gmailextract.parse_date(date_str)
+    hits = gmailextract.parse_date.cache_info().hits
+
+    assert gmailextract.parse_date(date_str) is first
+    assert gmailextract.parse_date.cache_info().hits == hits + 1
+    assert first.utcoffset().total_seconds() == 3600
+
+
+def test_parse_date_naive_inputs_get_a_timezone():
+    # email.utils returns a naive datetime for -0000, and has no offset for
+    # the parenthetical form; both go through the fallback parser
+    for date_str in ('Mon, 2 Dec 2024 10:00:00 -0000', 'Mon, 2 Dec 2024 10:00:00 +0000 (UTC)'):
+        parsed = gmailextract.parse_date(date_str)
+        assert parsed.tzinfo is not None
+        assert parsed.astimezone(timezone.utc).hour == 10
+
+
+def test_base64_decode_padded():
+    data = base64.urlsafe_b64encode(b'hello world?>').decode()
+
+    assert gmailextract.safe_base64_decode(data) == b'hello world?>'
+
+
+def test_base64_decode_adds_missing_padding():
+    data = base64.urlsafe_b64encode(b'hello world?>').decode().rstrip('=')
+
+    assert gmailextract.safe_base64_decode(data) == b'hello world?>'
+    assert gmailextract.safe_base64_decode(data.encode()) == b'hello world?>'
+
+
+def test_base64_decode_strips_whitespace():
+    data = base64.urlsafe_b64encode(b'a longer newsletter body' * 4).decode()
+    wrapped = '\r\n'.join(data[i:i + 19] for i in range(0, len(data), 19))
+
+    assert gmailextract.safe_base64_decode(wrapped) == b'a longer newsletter body' * 4
@@ -0,0 +1,48 @@
+import orjson
+import pytest
+
+from incremental_email_handler import IncrementalEmailHandler, iter_json_array
+
+
+def _email(email_id, date='2024-12-01T10:00:00+00:00'):
+    return {'id': email_id, 'from': 'news@example.com', 'parsedDate': date, 'subject': f'Subject {email_id}'}
+
+
+@pytest.mark.parametrize('count', [0, 1, 2000])
+def test_iter_json_array_matches_orjson(count):
+    items = [_email(str(i)) for i in range(count)]
+    option = orjson.OPT_NON_STR_KEYS
+
+    expected = orjson.dumps(items, option=option | orjson.OPT_INDENT_2)
+
+    assert b''.join(iter_json_array(items, option)) == expected
+
+
+def test_merge_emails_skips_duplicates_within_batch(tmp_path):
+    handler = IncrementalEmailHandler(str(tmp_path / 'emails.json'))
+    handler.existing_emails = [_email('1')]
+    handler.existing_ids = {'1'}
+    existing_list = handler.existing_emails
+
+    merged = handler.merge_emails([_email('2'), _email('1'), _email('2'), _email('3')])
+
+    assert [email['id'] for email in merged] == ['1', '2', '3']
+    assert merged is existing_list
+    assert handler.existing_ids == {'1', '2', '3'}
+
+
+def test_process_new_emails_rolls_back_failed_save(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    handler = IncrementalEmailHandler(str(tmp_path / 'emails.json'))
+    handler.process_new_emails([_email('1', '2024-12-02T10:00:00+00:00')])
+
+    def failing_write(path, chunks):
+        raise OSError('disk full')
+    monkeypatch.setattr('incremental_email_handler.atomic_write_chunks', failing_write)
+
+    with pytest.raises(OSError):
+        handler.process_new_emails([_email('2', '2024-12-05T10:00:00+00:00'), _email('3', '2024-11-20T10:00:00+00:00')])
+
+    assert [email['id'] for email in handler.existing_emails] == ['1']
+    assert handler.existing_ids == {'1'}
+    assert handler.get_latest_email_date() == '2024-12-02T10:00:00+00:00'
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+from mongo_loader import MongoDBLoader
+
+
+class FakeCollection:
+    """Just enough of a pymongo collection for _process_batch."""
+
+    def __init__(self, ids=(), bulk_error=None):
+        self.ids = set(ids)
+        self.bulk_error = bulk_error
+        self.bulk_writes = []
+
+    def find(self, query, projection):
+        return [{'id': email_id} for email_id in query['id']['$in'] if email_id in self.ids]
+
+    def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(len(operations))
+        if self.bulk_error is not None:
+            raise self.bulk_error
+        return SimpleNamespace(upserted_count=len(operations))
+
+
+def _new_stats():
+    return {'successful': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+
+
+def _batch(*ids):
+    return [{'id': email_id, 'subject': f'Subject {email_id}'} for email_id in ids]
+
+
+def test_process_batch_counts_inserts_and_duplicates():
+    loader = MongoDBLoader('mongodb://localhost')
+    collection = FakeCollection(ids={'b'})
+    stats = _new_stats()
+
+    loader._process_batch(_batch('a', 'b', 'c'), stats, collection)
+
+    assert stats == {'successful': 2, 'duplicates': 1, 'failed': 0, 'errors': []}
+    # The email already stored is never sent
+    assert collection.bulk_writes == [2]
+
+
+def test_process_batch_all_duplicates_skips_write():
+    loader = MongoDBLoader('mongodb://localhost')
+    collection = FakeCollection(ids={'a', 'b'})
+    stats = _new_stats()
+
+    loader._process_batch(_batch('a', 'b'), stats, collection)
+
+    assert stats['successful'] == 0
+    assert stats['duplicates'] == 2
+    assert collection.bulk_writes == []
+
+
+def test_process_batch_concurrent_duplicate_key():
+    error = BulkWriteError({
+        'nUpserted': 1,
+        'writeErrors': [{'code': 11000, 'errmsg': 'E11000 duplicate key error index: id_1'}]
+    })
+    loader = MongoDBLoader('mongodb://localhost')
+    stats = _new_stats()
+
+    loader._process_batch(_batch('a', 'b'), stats, FakeCollection(bulk_error=error))
+
+    assert stats == {'successful': 1, 'duplicates': 1, 'failed': 0, 'errors': []}
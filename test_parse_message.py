@@ -0,0 +1,41 @@
+import base64
+
+import gmailextract
+
+
+def _b64(text):
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def test_parse_multipart_message_with_attachment(monkeypatch):
+    """An attachment part has no inline body/data, so the fields mask drops its body."""
+    monkeypatch.setattr(gmailextract, 'is_filtered_sender', lambda sender: True)
+    msg = {
+        'id': 'abc123',
+        'threadId': 'abc123',
+        'payload': {
+            'mimeType': 'multipart/mixed',
+            'headers': [
+                {'name': 'From', 'value': 'Newsletter <news@example.com>'},
+                {'name': 'Date', 'value': 'Mon, 2 Dec 2024 10:00:00 +0000'},
+                {'name': 'Subject', 'value': 'Weekly digest'},
+            ],
+            'parts': [
+                {'mimeType': 'text/plain', 'filename': 'notes.txt'},
+                {'mimeType': 'application/pdf', 'filename': 'digest.pdf'},
+                {
+                    'mimeType': 'multipart/alternative',
+                    'parts': [
+                        {'mimeType': 'text/plain', 'body': {'data': _b64('Hello from the digest')}},
+                        {'mimeType': 'text/html', 'body': {'data': _b64('<p>Hello from the digest</p>')}},
+                    ],
+                },
+            ],
+        },
+    }
+
+    result = gmailextract.parse_message(msg)
+
+    assert result['status'] == 'success'
+    assert result['subject'] == 'Weekly digest'
+    assert 'Hello from the digest' in result['body']['clean_text']
@@ -0,0 +1,126 @@
+from collections import Counter
+
+from pymongo.errors import OperationFailure
+
+import verify_mongo_data
+from verify_mongo_data import (
+    analyze_subject_keywords,
+    collect_collection_stats,
+    extract_keywords,
+)
+
+SUBJECTS = [
+    'Fed holds rates steady',
+    'Markets: Fed rates & the week ahead',
+    'Café culture, rates and the economy',
+    None,
+]
+
+
+class FakeCursor(list):
+    def batch_size(self, size):
+        return self
+
+
+class FakeCollection:
+    """Collection whose aggregate fails like a server without $regexFindAll."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def aggregate(self, pipeline):
+        raise OperationFailure("Unrecognized expression '$regexFindAll'")
+
+    def find(self, query, projection):
+        return FakeCursor({'subject': doc['subject']} for doc in self.docs if doc['subject'] is not None)
+
+
+def test_keyword_fallback_counts_client_side():
+    collection = FakeCollection([{'subject': subject} for subject in SUBJECTS])
+
+    expected = Counter()
+    for subject in SUBJECTS:
+        if subject:
+            expected.update(extract_keywords(subject))
+
+    keywords = analyze_subject_keywords(collection)
+
+    assert keywords == expected.most_common(10)
+    assert keywords[0] == ('rates', 3)
+    assert ('café', 1) in keywords
+
+
+def test_extract_keywords_ascii_matches_regex_path():
+    subject = 'Breaking: The Fed & ECB hold rates (again) -- 2024_Q4 outlook!'
+
+    expected = [
+        word for word in verify_mongo_data._replace_non_word(' ', subject.lower()).split()
+        if word not in verify_mongo_data.STOP_WORDS and len(word) > 2
+    ]
+
+    assert extract_keywords(subject) == expected
+
+
+class FacetCollection:
+    """Returns a canned $facet result, as mongomock can't run the stats pipeline."""
+
+    def __init__(self, facets):
+        self.facets = facets
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([self.facets])
+
+
+def test_collect_collection_stats_unpacks_facets():
+    collection = FacetCollection({
+        'total': [{'n': 4}],
+        'missing_dates': [{'n': 1}],
+        'missing_bodies': [],
+        'missing_subjects': [{'n': 2}],
+        'duplicates': [],
+        'daily': [
+            {'_id': '2024-12-02', 'count': 2},
+            {'_id': None, 'count': 1},
+            {'_id': '2024-12-01', 'count': 1},
+        ],
+        'top_senders': [{'_id': 'news@example.com', 'count': 3}],
+        'content': [{'_id': None, 'avgLength': 10.0, 'minLength': 5, 'maxLength': 15,
+                     'totalUrls': 4, 'avgUrls': 1.0}],
+        'date_range': [{'_id': None, 'earliest': '2024-12-01T08:00:00+00:00',
+                        'latest': '2024-12-02T09:00:00+00:00'}],
+    })
+
+    stats = collect_collection_stats(collection)
+
+    assert collection.pipelines == [verify_mongo_data.COLLECTION_STATS_PIPELINE]
+    assert (stats['total'], stats['missing_dates'], stats['missing_bodies'],
+            stats['missing_subjects'], stats['duplicates']) == (4, 1, 0, 2, 0)
+    assert [day['_id'] for day in stats['daily']] == [None, '2024-12-01', '2024-12-02']
+    assert stats['top_senders'] == [{'_id': 'news@example.com', 'count': 3}]
+    assert stats['content']['maxLength'] == 15
+    assert stats['date_range']['latest'] == '2024-12-02T09:00:00+00:00'
+
+
+def test_collect_collection_stats_empty_collection():
+    facets = {name: [] for name in (
+        'total', 'missing_dates', 'missing_bodies', 'missing_subjects', 'duplicates',
+        'daily', 'top_senders', 'content', 'date_range'
+    )}
+
+    stats = collect_collection_stats(FacetCollection(facets))
+
+    assert stats['total'] == 0
+    assert stats['daily'] == []
+    assert stats['content'] is None
+    assert stats['date_range'] is None
+
+
+def test_collection_stats_facets_cover_unpacked_keys():
+    facet_stage = verify_mongo_data.COLLECTION_STATS_PIPELINE[-1]['$facet']
+
+    assert set(facet_stage) == {
+        'total', 'missing_dates', 'missing_bodies', 'missing_subjects', 'duplicates',
+        'daily', 'top_senders', 'content', 'date_range'
+    }
@@ -1,8 +1,9 @@
 import logging
-from mongo_loader import MongoDBLoader
-from pymongo.errors import ConnectionFailure
+from mongo_loader import get_loader
+from pymongo.errors import ConnectionFailure, OperationFailure
 from datetime import datetime, timedelta
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import re
 from typing import List, Dict
 
@@ -12,136 +13,250 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Documents per getMore when streaming subjects for keyword analysis
+SUBJECT_BATCH_SIZE = 5000
+
+# Replaces characters that are neither word characters nor whitespace
+_replace_non_word = re.compile(r'[^\w\s]').sub
+
+# Byte-level equivalent of _replace_non_word for ASCII subjects (most of them),
+# where bytes.translate is several times faster than the regex
+_ASCII_NON_WORD_TABLE = bytes(
+    c if chr(c).isalnum() or chr(c) == '_' or chr(c).isspace() else ord(' ')
+    for c in range(128)
+) + b' ' * 128
+
+# Common words left out of the subject keyword counts
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+
+# Server-side version of extract_keywords + Counter.most_common(10): split
+# subjects into word tokens, drop stop words and short words, and return only
+# the top 10 counts. $toLower only folds ASCII, so non-ASCII words may count
+# slightly differently from the Python path.
+SUBJECT_KEYWORDS_PIPELINE = [
+    {"$match": {"subject": {"$type": "string"}}},
+    {"$project": {
+        "_id": 0,
+        "tokens": {"$regexFindAll": {"input": {"$toLower": "$subject"}, "regex": r"(*UCP)\w+"}}
+    }},
+    {"$unwind": "$tokens"},
+    {"$project": {"word": "$tokens.match"}},
+    {"$match": {
+        "word": {"$nin": sorted(STOP_WORDS)},
+        "$expr": {"$gt": [{"$strLenCP": "$word"}, 2]}
+    }},
+    {"$group": {"_id": "$word", "count": {"$sum": 1}}},
+    {"$sort": {"count": -1, "_id": 1}},
+    {"$limit": 10}
+]
+
 def extract_keywords(subject: str) -> List[str]:
     """Extract meaningful keywords from subject line."""
     # Remove special characters and convert to lowercase
-    cleaned = re.sub(r'[^\w\s]', ' ', subject.lower())
+    if subject.isascii():
+        cleaned = subject.encode('ascii').lower().translate(_ASCII_NON_WORD_TABLE).decode('ascii')
+    else:
+        cleaned = _replace_non_word(' ', subject.lower())
     words = cleaned.split()
     # Filter out common stop words
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-    return [word for word in words if word not in stop_words and len(word) > 2]
-
-def analyze_daily_distribution(collection) -> Dict:
-    """Analyze email distribution by day."""
-    pipeline = [
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": {
-                            "$dateFromString": {
-                                "dateString": "$parsedDate"
-                            }
+    return [word for word in words if word not in STOP_WORDS and len(word) > 2]
+
+# Email counts per day; the few day buckets are sorted client-side
+DAILY_DISTRIBUTION_STAGES = [
+    {
+        "$group": {
+            "_id": {
+                "$dateToString": {
+                    "format": "%Y-%m-%d",
+                    "date": {
+                        "$dateFromString": {
+                            "dateString": "$parsedDate"
                         }
                     }
-                },
-                "count": {"$sum": 1}
-            }
-        },
-        {"$sort": {"_id": 1}}
-    ]
-    return list(collection.aggregate(pipeline))
-
-def analyze_content_length(collection) -> Dict:
-    """Analyze email content length statistics."""
-    pipeline = [
-        {
-            "$project": {
-                "contentLength": {"$strLenCP": "$body.clean_text"},
-                "urlCount": {"$size": {"$ifNull": ["$body.urls", []]}},
-            }
-        },
-        {
-            "$group": {
-                "_id": None,
-                "avgLength": {"$avg": "$contentLength"},
-                "minLength": {"$min": "$contentLength"},
-                "maxLength": {"$max": "$contentLength"},
-                "totalUrls": {"$sum": "$urlCount"},
-                "avgUrls": {"$avg": "$urlCount"}
-            }
+                }
+            },
+            "count": {"$sum": 1}
         }
-    ]
-    return list(collection.aggregate(pipeline))[0]
+    }
+]
+
+# Content length and URL statistics over all emails
+CONTENT_LENGTH_STAGES = [
+    {
+        "$project": {
+            "contentLength": {"$strLenCP": "$body.clean_text"},
+            "urlCount": {"$size": {"$ifNull": ["$body.urls", []]}},
+        }
+    },
+    {
+        "$group": {
+            "_id": None,
+            "avgLength": {"$avg": "$contentLength"},
+            "minLength": {"$min": "$contentLength"},
+            "maxLength": {"$max": "$contentLength"},
+            "totalUrls": {"$sum": "$urlCount"},
+            "avgUrls": {"$avg": "$urlCount"}
+        }
+    }
+]
+
+TOP_SENDERS_STAGES = [
+    {"$group": {"_id": "$from", "count": {"$sum": 1}}},
+    {"$sort": {"count": -1}},
+    {"$limit": 5}
+]
+
+# Every collection-wide statistic in one aggregation, so the collection is
+# scanned once and all metrics come back in a single response
+COLLECTION_STATS_PIPELINE = [
+    # Carry only the fields the facets read rather than whole email bodies
+    {"$project": {
+        "_id": 0,
+        "id": 1,
+        "from": 1,
+        "parsedDate": 1,
+        "subject": 1,
+        "body.clean_text": 1,
+        "body.urls": 1,
+        "bodyMissing": {"$eq": [{"$ifNull": ["$body", None]}, None]}
+    }},
+    {"$facet": {
+        "total": [{"$count": "n"}],
+        "missing_dates": [{"$match": {"parsedDate": None}}, {"$count": "n"}],
+        "missing_bodies": [{"$match": {"bodyMissing": True}}, {"$count": "n"}],
+        "missing_subjects": [{"$match": {"subject": None}}, {"$count": "n"}],
+        "duplicates": [
+            {"$group": {"_id": "$id", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$count": "n"}
+        ],
+        "daily": DAILY_DISTRIBUTION_STAGES,
+        "top_senders": TOP_SENDERS_STAGES,
+        "content": CONTENT_LENGTH_STAGES,
+        "date_range": [
+            {"$group": {"_id": None, "earliest": {"$min": "$parsedDate"}, "latest": {"$max": "$parsedDate"}}}
+        ]
+    }}
+]
+
+def collect_collection_stats(collection) -> Dict:
+    """
+    Run COLLECTION_STATS_PIPELINE and unpack its facets.
+
+    Returns:
+        Dict with the counts total, missing_dates, missing_bodies,
+        missing_subjects and duplicates, the daily and top_senders lists, and
+        the content statistics and date_range (None for an empty collection)
+    """
+    facets = next(collection.aggregate(COLLECTION_STATS_PIPELINE))
+    stats = {
+        name: facets[name][0]['n'] if facets[name] else 0
+        for name in ('total', 'missing_dates', 'missing_bodies', 'missing_subjects', 'duplicates')
+    }
+    # Oldest day first, with emails that have no date (a None day) leading,
+    # as a server-side sort would order them
+    stats['daily'] = sorted(facets['daily'], key=lambda day: (day['_id'] is not None, day['_id'] or ''))
+    stats['top_senders'] = facets['top_senders']
+    stats['content'] = facets['content'][0] if facets['content'] else None
+    stats['date_range'] = facets['date_range'][0] if facets['date_range'] else None
+    return stats
 
 def analyze_subject_keywords(collection) -> List[tuple]:
-    """Analyze common keywords in subject lines."""
-    subjects = collection.find({}, {"subject": 1})
-    all_keywords = []
+    """
+    Analyze common keywords in subject lines.
+
+    Keywords are counted by an aggregation so only the top 10 leave the
+    server; servers without $regexFindAll (before 4.2) fall back to counting
+    the subjects client-side.
+    """
+    try:
+        return [(doc['_id'], doc['count'])
+                for doc in collection.aggregate(SUBJECT_KEYWORDS_PIPELINE)]
+    except OperationFailure as e:
+        logger.warning(f"Keyword aggregation failed, counting client-side: {e}")
+        return count_subject_keywords(collection)
+
+def count_subject_keywords(collection) -> List[tuple]:
+    """Count common keywords in subject lines client-side."""
+    # Only subjects cross the wire, in large batches; documents without a
+    # subject are filtered out server-side
+    subjects = collection.find(
+        {"subject": {"$ne": None}}, {"subject": 1, "_id": 0}
+    ).batch_size(SUBJECT_BATCH_SIZE)
+    # Count as we go so memory is bounded by the vocabulary, not the corpus
+    keyword_counts = Counter()
     for doc in subjects:
-        if doc.get('subject'):
-            all_keywords.extend(extract_keywords(doc['subject']))
-    return Counter(all_keywords).most_common(10)
+        if doc['subject']:
+            keyword_counts.update(extract_keywords(doc['subject']))
+    return keyword_counts.most_common(10)
 
 def verify_mongodb_data():
     """Verify and analyze the data loaded in MongoDB."""
-    loader = None
     try:
-        loader = MongoDBLoader()
+        loader = get_loader()
         
-        if not loader.connect():
+        if loader is None:
             logger.error("Failed to connect to MongoDB")
             return
             
-        loader.initialize_database()
+        # Verification only reads; index setup is left to the load path
+        loader.use_collection()
+        
+        # The statistics, keyword and sample queries are independent, so run
+        # them concurrently over the shared (thread-safe) client
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            stats_future = executor.submit(collect_collection_stats, loader.collection)
+            keywords_future = executor.submit(analyze_subject_keywords, loader.collection)
+            subjects_future = executor.submit(
+                lambda: list(loader.collection.find({}, {"subject": 1}).limit(5))
+            )
+        collection_stats = stats_future.result()
         
         # Basic Collection Stats
         logger.info("\n=== Basic Collection Statistics ===")
-        total_docs = loader.collection.count_documents({})
-        logger.info(f"Total documents in collection: {total_docs}")
+        logger.info(f"Total documents in collection: {collection_stats['total']}")
         
         # Date Range Analysis
-        latest = list(loader.collection.find().sort("parsedDate", -1).limit(1))
-        earliest = list(loader.collection.find().sort("parsedDate", 1).limit(1))
-        
-        if latest and earliest:
-            logger.info(f"Date range: from {earliest[0].get('parsedDate')} to {latest[0].get('parsedDate')}")
+        # $min/$max skip emails without a parsedDate
+        date_range = collection_stats['date_range']
+        if date_range:
+            logger.info(f"Date range: from {date_range['earliest']} to {date_range['latest']}")
         
         # Daily Distribution
         logger.info("\n=== Daily Email Distribution ===")
-        daily_dist = analyze_daily_distribution(loader.collection)
-        for day in daily_dist:
+        for day in collection_stats['daily']:
             logger.info(f"  {day['_id']}: {day['count']} emails")
             
         # Sender Analysis
         logger.info("\n=== Top Email Senders ===")
-        pipeline = [
-            {"$group": {"_id": "$from", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 5}
-        ]
-        
-        top_senders = list(loader.collection.aggregate(pipeline))
-        for sender in top_senders:
+        for sender in collection_stats['top_senders']:
             logger.info(f"  {sender['_id']}: {sender['count']} emails")
             
         # Content Analysis
         logger.info("\n=== Content Analysis ===")
-        content_stats = analyze_content_length(loader.collection)
-        logger.info(f"Average content length: {int(content_stats['avgLength'])} characters")
-        logger.info(f"Shortest email: {content_stats['minLength']} characters")
-        logger.info(f"Longest email: {content_stats['maxLength']} characters")
-        logger.info(f"Total URLs found: {content_stats['totalUrls']}")
-        logger.info(f"Average URLs per email: {content_stats['avgUrls']:.2f}")
+        content_stats = collection_stats['content']
+        if content_stats:
+            logger.info(f"Average content length: {int(content_stats['avgLength'])} characters")
+            logger.info(f"Shortest email: {content_stats['minLength']} characters")
+            logger.info(f"Longest email: {content_stats['maxLength']} characters")
+            logger.info(f"Total URLs found: {content_stats['totalUrls']}")
+            logger.info(f"Average URLs per email: {content_stats['avgUrls']:.2f}")
             
         # Subject Analysis
         logger.info("\n=== Top Subject Keywords ===")
-        keywords = analyze_subject_keywords(loader.collection)
-        for keyword, count in keywords:
+        for keyword, count in keywords_future.result():
             logger.info(f"  {keyword}: {count} occurrences")
             
         # Sample Content
         logger.info("\n=== Sample Email Subjects ===")
-        subjects = list(loader.collection.find({}, {"subject": 1}).limit(5))
-        for subject in subjects:
+        for subject in subjects_future.result():
             logger.info(f"  - {subject.get('subject', 'No subject')}")
             
         # Data Quality Checks
         logger.info("\n=== Data Quality Checks ===")
-        missing_dates = loader.collection.count_documents({"parsedDate": None})
-        missing_bodies = loader.collection.count_documents({"body": None})
-        missing_subjects = loader.collection.count_documents({"subject": None})
+        missing_dates = collection_stats['missing_dates']
+        missing_bodies = collection_stats['missing_bodies']
+        missing_subjects = collection_stats['missing_subjects']
         
         if missing_dates > 0:
             logger.warning(f"Found {missing_dates} documents with missing dates")
@@ -151,21 +266,13 @@ def verify_mongodb_data():
             logger.warning(f"Found {missing_subjects} documents with missing subjects")
             
         # Check for duplicate IDs
-        pipeline = [
-            {"$group": {"_id": "$id", "count": {"$sum": 1}}},
-            {"$match": {"count": {"$gt": 1}}}
-        ]
-        duplicates = list(loader.collection.aggregate(pipeline))
-        if duplicates:
-            logger.warning(f"Found {len(duplicates)} duplicate IDs")
+        if collection_stats['duplicates']:
+            logger.warning(f"Found {collection_stats['duplicates']} duplicate IDs")
             
     except ConnectionFailure as e:
         logger.error(f"MongoDB connection error: {e}")
     except Exception as e:
         logger.error(f"Error during verification: {e}")
-    finally:
-        if loader:
-            loader.close()
 
 if __name__ == "__main__":
     verify_mongodb_data()
\ No newline at end of file
@@ -1,21 +1,53 @@
 import json
 import logging
-from mongo_loader import MongoDBLoader
+from mongo_loader import get_loader
+
+try:
+    import ijson
+except ImportError:  # Optional: streams the JSON file instead of loading it whole
+    ijson = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ids per $in query when looking up JSON ids in MongoDB
+ID_QUERY_CHUNK_SIZE = 1000
+
+def count_ids_in_collection(collection, ids) -> int:
+    """
+    Count how many of the given ids are in the collection.
+
+    The ids are looked up in chunks against the unique id index, so MongoDB
+    ids never have to be pulled to the client.
+    """
+    found = 0
+    for i in range(0, len(ids), ID_QUERY_CHUNK_SIZE):
+        found += collection.count_documents({'id': {'$in': ids[i:i + ID_QUERY_CHUNK_SIZE]}})
+    return found
+
+def read_json_ids(filename: str) -> list:
+    """
+    Read the id of every email in the JSON file.
+
+    With ijson only the id values are decoded, one at a time, instead of
+    parsing the whole archive (bodies included) into memory.
+    """
+    if ijson is not None:
+        with open(filename, 'rb') as f:
+            return list(ijson.items(f, 'item.id'))
+    with open(filename, 'r') as f:
+        return [email['id'] for email in json.load(f)]
+
 def verify_state():
     """Verify the state of JSON and MongoDB data."""
     try:
         # Check JSON file
-        with open('filtered_emails.json', 'r') as f:
-            json_data = json.load(f)
-        logger.info(f"JSON file contains {len(json_data)} emails")
+        json_id_list = read_json_ids('filtered_emails.json')
+        logger.info(f"JSON file contains {len(json_id_list)} emails")
         
         # Check MongoDB
-        mongo_loader = MongoDBLoader()
-        if mongo_loader.connect():
+        mongo_loader = get_loader()
+        if mongo_loader is not None:
             stats = mongo_loader.get_collection_stats()
             logger.info("\nMongoDB Stats:")
             logger.info(f"Total documents: {stats['total_documents']}")
@@ -24,18 +56,19 @@ def verify_state():
             for sender, count in stats['sender_counts'].items():
                 logger.info(f"  {sender}: {count}")
                 
-            # Compare IDs
-            json_ids = set(email['id'] for email in json_data)
-            mongo_ids = set(doc['id'] for doc in mongo_loader.collection.find({}, {'id': 1}))
+            # Compare IDs. MongoDB ids are unique, so every stored id that
+            # isn't one of the JSON ids is in MongoDB only
+            json_ids = set(json_id_list)
+            shared_count = count_ids_in_collection(mongo_loader.collection, list(json_ids))
+            json_only = len(json_ids) - shared_count
+            mongo_only = stats['total_documents'] - shared_count
             
             logger.info("\nComparison:")
-            logger.info(f"IDs in JSON but not in MongoDB: {len(json_ids - mongo_ids)}")
-            logger.info(f"IDs in MongoDB but not in JSON: {len(mongo_ids - json_ids)}")
+            logger.info(f"IDs in JSON but not in MongoDB: {json_only}")
+            logger.info(f"IDs in MongoDB but not in JSON: {mongo_only}")
             
-            if json_ids != mongo_ids:
+            if json_only or mongo_only:
                 logger.warning("Data inconsistency detected!")
-                
-        mongo_loader.close()
         
     except Exception as e:
         logger.error(f"Error during verification: {e}")